@@ -0,0 +1,123 @@
+"""Tests for checkpoint logs and their replay by the product/SKU and image agents."""
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from vtex_agent.utils import state_manager
+from vtex_agent.utils.state_manager import (
+    append_checkpoint,
+    load_checkpoints,
+    clear_checkpoints,
+    load_state,
+)
+from vtex_agent.agents.vtex_product_sku_agent import VTEXProductSKUAgent
+from vtex_agent.agents.vtex_image_agent import VTEXImageAgent
+
+
+class StateDirTestCase(unittest.TestCase):
+    """Points state_manager.STATE_DIR at a temporary directory for each test."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        patcher = mock.patch.object(state_manager, "STATE_DIR", Path(self._tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_raw_line(self, step_name, line):
+        with open(state_manager._checkpoint_path(step_name), "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class CheckpointLogTest(StateDirTestCase):
+
+    def test_records_load_in_order_and_malformed_lines_are_skipped(self):
+        append_checkpoint("vtex_products_skus", {"url": "a"})
+        self.write_raw_line("vtex_products_skus", '{"url": "trunc')
+        self.write_raw_line("vtex_products_skus", "")
+        append_checkpoint("vtex_products_skus", {"url": "b"})
+
+        self.assertEqual(load_checkpoints("vtex_products_skus"), [{"url": "a"}, {"url": "b"}])
+
+    def test_clear_removes_the_log(self):
+        append_checkpoint("vtex_images", {"sku_id": 1})
+        clear_checkpoints("vtex_images")
+        clear_checkpoints("vtex_images")  # Clearing a missing log is a no-op
+
+        self.assertEqual(load_checkpoints("vtex_images"), [])
+        self.assertFalse(state_manager._checkpoint_path("vtex_images").exists())
+
+
+class ProductCheckpointReplayTest(StateDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.agent = VTEXProductSKUAgent(vtex_client=object(), field_type_overrides={"Cor": "Text"})
+
+    def test_replay_merges_later_entries_over_earlier_ones(self):
+        append_checkpoint("vtex_products_skus", {"url": "u1", "product": {"id": 1, "skus": []}})
+        append_checkpoint("vtex_products_skus", {"url": "u2", "product": {"id": 2, "skus": []}})
+        append_checkpoint("vtex_products_skus", {"url": "u1", "product": {"id": 11, "skus": []}})
+        products = {"u0": {"id": 0, "skus": []}, "u1": {"id": -1, "skus": []}}
+
+        replayed = self.agent._replay_checkpoints(products)
+
+        self.assertEqual(replayed, 3)
+        self.assertEqual({url: p["id"] for url, p in products.items()}, {"u0": 0, "u1": 11, "u2": 2})
+
+    def test_replay_skips_malformed_records(self):
+        append_checkpoint("vtex_products_skus", {"url": "u1"})
+        append_checkpoint("vtex_products_skus", {"product": {"id": 2}})
+        append_checkpoint("vtex_products_skus", {"url": "u3", "product": "not a dict"})
+        append_checkpoint("vtex_products_skus", ["not", "a", "record"])
+        self.write_raw_line("vtex_products_skus", '{"url": "u4", "prod')
+        append_checkpoint("vtex_products_skus", {"url": "u5", "product": {"id": 5, "skus": []}})
+        products = {}
+
+        replayed = self.agent._replay_checkpoints(products)
+
+        self.assertEqual(replayed, 1)
+        self.assertEqual(list(products), ["u5"])
+
+    def test_save_snapshot_writes_state_and_clears_the_log(self):
+        append_checkpoint("vtex_products_skus", {"url": "u1", "product": {"id": 1, "skus": [{"id": 7}]}})
+        self.agent._replay_checkpoints(self.agent.products)
+
+        output = self.agent._save_snapshot()
+
+        self.assertEqual(load_checkpoints("vtex_products_skus"), [])
+        self.assertEqual(load_state("vtex_products_skus")["products"], output["products"])
+        self.assertEqual(output["summary"]["total_skus"], 1)
+
+
+class ImageCheckpointReplayTest(StateDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.agent = VTEXImageAgent(vtex_client=object())
+
+    def test_replay_merges_later_entries_and_skips_malformed_records(self):
+        append_checkpoint("vtex_images", {"sku_id": 1, "result": {"status": "failed"}})
+        append_checkpoint("vtex_images", {"sku_id": 2})
+        append_checkpoint("vtex_images", {"result": {"status": "completed"}})
+        self.write_raw_line("vtex_images", '{"sku_id": 3, "res')
+        append_checkpoint("vtex_images", {"sku_id": 1, "result": {"status": "completed"}})
+        associations = {"9": {"status": "completed"}}
+
+        replayed = self.agent._replay_checkpoints(associations)
+
+        self.assertEqual(replayed, 2)
+        self.assertEqual(associations, {"9": {"status": "completed"}, "1": {"status": "completed"}})
+
+    def test_save_snapshot_writes_state_and_clears_the_log(self):
+        append_checkpoint("vtex_images", {"sku_id": 1, "result": {"status": "completed"}})
+
+        output = self.agent._save_snapshot({"sku_image_associations": {"1": {"status": "completed"}}})
+
+        self.assertEqual(load_checkpoints("vtex_images"), [])
+        self.assertEqual(load_state("vtex_images"), output)
+
+
+if __name__ == "__main__":
+    unittest.main()
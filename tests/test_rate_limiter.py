@@ -0,0 +1,50 @@
+"""Tests for vtex_agent.utils.rate_limiter."""
+import threading
+import time
+import unittest
+
+from vtex_agent.utils.rate_limiter import TokenBucket
+
+
+class TokenBucketPenalizeTest(unittest.TestCase):
+
+    def test_concurrent_penalties_do_not_add_up(self):
+        bucket = TokenBucket(rate=100, capacity=1)
+        barrier = threading.Barrier(8)
+
+        def hit_429():
+            barrier.wait()
+            bucket.penalize(0.3)
+
+        threads = [threading.Thread(target=hit_429) for _ in range(8)]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        bucket.acquire()
+        waited = time.monotonic() - start
+
+        self.assertGreaterEqual(waited, 0.3)
+        self.assertLess(waited, 0.6)
+
+    def test_rate_halves_once_per_pause_and_recovers(self):
+        bucket = TokenBucket(rate=100, capacity=1)
+        bucket.RECOVERY_SECONDS = 0.5
+        for _ in range(5):
+            bucket.penalize(0.1)
+        self.assertEqual(bucket.rate, 50)
+
+        time.sleep(0.8)
+        bucket.acquire()
+        self.assertEqual(bucket.rate, 100)
+
+    def test_rate_never_drops_below_min_rate(self):
+        bucket = TokenBucket(rate=8, capacity=1, min_rate=2)
+        for _ in range(5):
+            bucket.penalize(0)
+        self.assertEqual(bucket.rate, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,17 +1,23 @@
 """Migration Agent - Coordinates the VTEX migration workflow."""
 import os
 import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional
 
 from .legacy_site_agent import LegacySiteAgent
 from .vtex_category_tree_agent import VTEXCategoryTreeAgent
-from .vtex_product_sku_agent import VTEXProductSKUAgent
+from .vtex_product_sku_agent import VTEXProductSKUAgent, default_skus
 from .vtex_image_agent import VTEXImageAgent
 from ..clients.vtex_client import VTEXClient
 from ..utils.state_manager import save_state, load_state, STATE_DIR
 from ..utils.logger import get_agent_logger
+from ..utils.console import buffered_stdout
 from ..tools.gemini_mapper import analyze_structure_from_sample
 
+# SKUs of one product created in parallel during execution
+MAX_CONCURRENT_SKUS = 8
+
 
 class MigrationAgent:
     """Migration coordinator agent for VTEX catalog migration."""
@@ -161,8 +167,7 @@ class MigrationAgent:
         # Analyze structure
         print("\n📊 Analyzing catalog structure...")
         sample_data = [p.get("mapped_data", p) for p in legacy_site_data.get("products", [])[:5]]
-        gemini_api_key = os.getenv("GEMINI_API_KEY")
-        structure = analyze_structure_from_sample(sample_data, gemini_api_key)
+        structure = self._analyze_structure_cached(sample_data)
         
         # Generate report
         report_lines = [
@@ -233,6 +238,43 @@ class MigrationAgent:
             "report_path": str(report_path)
         })
     
+    def _analyze_structure_cached(self, sample_data: list) -> Dict[str, Any]:
+        """
+        Analyze catalog structure, reusing a cached result for identical sample data.
+        
+        The cache is keyed by a hash of the sample so RETRY in the approval loop
+        does not trigger a new Gemini call when the input has not changed.
+        """
+        payload = json.dumps(sample_data, sort_keys=True, ensure_ascii=False, default=str)
+        key = hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+        cache_path = STATE_DIR / f"structure_cache_{key}.json"
+        
+        if cache_path.exists():
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    structure = json.load(f)
+                print("   ℹ️  Using cached structure analysis")
+                self.logger.info("Loaded structure analysis from cache: %s", cache_path)
+                return structure
+            except Exception as e:
+                self.logger.warning("Could not read structure cache %s: %s", cache_path, e)
+        
+        gemini_api_key = os.getenv("GEMINI_API_KEY")
+        structure = analyze_structure_from_sample(sample_data, gemini_api_key)
+        
+        # Failed analyses come back empty; don't cache them so RETRY can try again
+        if not structure:
+            return structure
+        
+        try:
+            STATE_DIR.mkdir(parents=True, exist_ok=True)
+            with open(cache_path, "w", encoding="utf-8") as f:
+                json.dump(structure, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            self.logger.warning("Could not write structure cache %s: %s", cache_path, e)
+        
+        return structure
+    
     def execution_phase(self, legacy_site_data: Dict[str, Any], require_approval: bool = True):
         """Step 6: Execution - Create catalog in VTEX."""
         if require_approval:
@@ -273,7 +315,7 @@ class MigrationAgent:
         except Exception as e:
             print(f"❌ VTEX credentials not configured: {e}")
             print("   Set VTEX_ACCOUNT_NAME, VTEX_APP_KEY, and VTEX_APP_TOKEN in .env")
-            self.logger.error(f"VTEX credentials not configured: {e}")
+            self.logger.error("VTEX credentials not configured: %s", e)
             return
         
         # Initialize VTEX agents (product agent can call category tree agent to create missing categories)
@@ -295,127 +337,139 @@ class MigrationAgent:
         print("   Order: Product → SKU → Images")
         
         products = legacy_site_data.get("products", [])
-        print(f"\n📦 Processing {len(products)} products...")
+        n_products = len(products)
+        print(f"\n📦 Processing {n_products} products...")
         
         all_image_results = {}
         
-        for i, product_data in enumerate(products, 1):
-            print(f"\n   [{i}/{len(products)}] Processing product...")
-            self.logger.info(f"Processing product {i}/{len(products)}")
-            
-            try:
-                # Create product (specifications disabled - pass empty dict)
-                product_info = self.vtex_product_sku_agent.create_single_product(
-                    product_data,
-                    vtex_category_tree,
-                    {"specification_fields": {}, "summary": {"fields_created": 0}}
-                )
-                
-                # If category tree was updated (e.g. missing categories created), use it for next products
-                if product_info and product_info.get("vtex_category_tree") is not None:
-                    vtex_category_tree = product_info["vtex_category_tree"]
+        # Progress lines are queued to a single writer so stdout never stalls the loop
+        with buffered_stdout(), ThreadPoolExecutor(max_workers=MAX_CONCURRENT_SKUS) as sku_pool:
+            for i, product_data in enumerate(products, 1):
+                print(f"\n   [{i}/{n_products}] Processing product...")
+                self.logger.info("Processing product %d/%d", i, n_products)
                 
-                if not product_info:
-                    self.logger.warning(f"Failed to create product {i}, skipping")
-                    continue
-                
-                product_id = product_info["id"]
-                product_url = product_data.get("url", f"product_{product_id}")
-                
-                # Get SKUs for this product
-                skus = product_data.get("skus", [])
-                if not skus:
-                    # Create default SKU
-                    skus = [{
-                        "Name": "Default",
-                        "EAN": f"EAN{product_id}",
-                        "IsActive": True
-                    }]
-                
-                # Get images for this product
-                images = product_data.get("images", [])
-                
-                # Create each SKU and immediately associate images
-                for sku_data in skus:
-                    # Create SKU
-                    sku_info = self.vtex_product_sku_agent.create_single_sku(
-                        product_id=product_id,
-                        product_url=product_url,
-                        sku_data=sku_data
+                try:
+                    # Create product (specifications disabled - pass empty dict)
+                    product_info = self.vtex_product_sku_agent.create_single_product(
+                        product_data,
+                        vtex_category_tree,
+                        {"specification_fields": {}, "summary": {"fields_created": 0}}
                     )
                     
-                    if not sku_info:
-                        self.logger.warning(f"Failed to create SKU for product {product_id}, skipping")
-                        continue
+                    # If category tree was updated (e.g. missing categories created), use it for next products
+                    if product_info and product_info.get("vtex_category_tree") is not None:
+                        vtex_category_tree = product_info["vtex_category_tree"]
                     
-                    sku_id = sku_info["id"]
-                    sku_name = sku_info["name"]
+                    if not product_info:
+                        self.logger.warning("Failed to create product %d, skipping", i)
+                        continue
                     
-                    # Step 1: Associate images with this SKU (VTEX requires files before SKU can be active)
-                    had_images = False
-                    if images:
-                        image_result = self.vtex_image_agent.associate_images_with_sku(
-                            sku_id=sku_id,
-                            sku_name=sku_name,
-                            image_urls=images
-                        )
-                        all_image_results[str(sku_id)] = image_result
-                        had_images = (image_result.get("total_associated") or 0) > 0
-                    else:
-                        self.logger.info(f"No images found for SKU {sku_id}")
+                    product_id = product_info["id"]
+                    product_url = product_data.get("url", f"product_{product_id}")
                     
-                    # Step 2: Activate SKU only after images are associated (VTEX requires files before IsActive=true)
-                    if had_images:
-                        try:
-                            self.vtex_client.update_sku(sku_id, is_active=True)
-                            print(f"       ✓ SKU activated (IsActive=true)")
-                        except Exception as activate_error:
-                            self.logger.warning(f"Could not activate SKU {sku_id}: {activate_error}")
-                            print(f"       ⚠️  Failed to activate SKU: {activate_error}")
-                    else:
-                        print(f"       ℹ️  SKU left inactive (no images; VTEX requires files before activating)")
+                    # Get SKUs for this product (default SKU if none were extracted)
+                    skus = product_data.get("skus") or default_skus(product_id)
                     
-                    # Step 3: Set price for this SKU
-                    # Order: Create SKU > Add images > Add price > Add inventory
-                    # Price from website is set as basePrice with markup=0
-                    try:
-                        price_value = sku_data.get("Price") or 0
-                        list_price_value = sku_data.get("ListPrice") or price_value
-                        self.vtex_client.set_sku_price(sku_id, price_value, list_price_value)
-                        print(f"       💰 Price set: {price_value} (basePrice, markup=0)")
-                    except Exception as price_error:
-                        self.logger.warning(f"Could not set price for SKU {sku_id}: {price_error}")
-                        print(f"       ⚠️  Failed to set price: {price_error}")
+                    # Get images for this product
+                    images = product_data.get("images") or []
                     
-                    # Step 4: Set inventory for this SKU in all warehouses
-                    # Inventory is set to 100 for all available warehouses
-                    try:
-                        inventory_results = self.vtex_client.set_sku_inventory_all_warehouses(
-                            sku_id=sku_id,
-                            quantity=100  # Set to 100 for all warehouses
+                    # Create the product's SKUs concurrently, then associate images, activate,
+                    # price and stock each SKU in order (SKUs share the product's image uploads)
+                    sku_futures = [
+                        sku_pool.submit(
+                            self.vtex_product_sku_agent.create_single_sku,
+                            product_id=product_id,
+                            product_url=product_url,
+                            sku_data=sku_data,
+                            add_to_product=False
                         )
-                        successful_warehouses = sum(1 for r in inventory_results.values() if r.get("success", False))
-                        print(f"       📦 Inventory set to 100 in {successful_warehouses}/{len(inventory_results)} warehouse(s)")
-                    except Exception as inventory_error:
-                        self.logger.warning(f"Could not set inventory for SKU {sku_id}: {inventory_error}")
-                        print(f"       ⚠️  Failed to set inventory: {inventory_error}")
-                
-            except Exception as e:
-                self.logger.error(f"Error processing product {i}: {e}", exc_info=True)
-                print(f"     ⚠️  Error processing product: {e}")
-                continue
-        
-        # Format outputs
-        vtex_products = self.vtex_product_sku_agent._format_output()
+                        for sku_data in skus
+                    ]
+                    for sku_data, sku_future in zip(skus, sku_futures):
+                        try:
+                            sku_info = sku_future.result()
+                        except Exception as sku_error:
+                            self.logger.error("Error creating SKU for product %s: %s", product_id, sku_error)
+                            print(f"       ⚠️  Error creating SKU: {sku_error}")
+                            continue
+                        
+                        if not sku_info:
+                            self.logger.warning("Failed to create SKU for product %s, skipping", product_id)
+                            continue
+                        
+                        # Record SKUs in input order, whatever order the pool finished them in
+                        self.vtex_product_sku_agent.add_sku_to_product(product_url, sku_info)
+                        
+                        sku_id = sku_info["id"]
+                        sku_name = sku_info["name"]
+                        
+                        # Step 1: Associate images with this SKU (VTEX requires files before SKU can be active)
+                        had_images = False
+                        if images:
+                            image_result = self.vtex_image_agent.associate_images_with_sku(
+                                sku_id=sku_id,
+                                sku_name=sku_name,
+                                image_urls=images
+                            )
+                            all_image_results[str(sku_id)] = image_result
+                            had_images = (image_result.get("total_associated") or 0) > 0
+                        else:
+                            self.logger.info("No images found for SKU %s", sku_id)
+                        
+                        # Step 2: Activate SKU only after images are associated (VTEX requires files before IsActive=true)
+                        if had_images:
+                            try:
+                                self.vtex_client.update_sku(sku_id, is_active=True)
+                                print(f"       ✓ SKU activated (IsActive=true)")
+                            except Exception as activate_error:
+                                self.logger.warning("Could not activate SKU %s: %s", sku_id, activate_error)
+                                print(f"       ⚠️  Failed to activate SKU: {activate_error}")
+                        else:
+                            print(f"       ℹ️  SKU left inactive (no images; VTEX requires files before activating)")
+                        
+                        # Step 3: Set price for this SKU
+                        # Order: Create SKU > Add images > Add price > Add inventory
+                        # Price from website is set as basePrice with markup=0
+                        try:
+                            price_value = sku_data.get("Price") or 0
+                            list_price_value = sku_data.get("ListPrice") or price_value
+                            if not price_value and not list_price_value:
+                                # Nothing to write for free/sample SKUs; skip the pricing call
+                                self.logger.debug("Skipping zero price for SKU %s", sku_id)
+                                print(f"       ℹ️  No price found; pricing call skipped")
+                            else:
+                                self.vtex_client.set_sku_price(sku_id, price_value, list_price_value)
+                                print(f"       💰 Price set: {price_value} (basePrice, markup=0)")
+                        except Exception as price_error:
+                            self.logger.warning("Could not set price for SKU %s: %s", sku_id, price_error)
+                            print(f"       ⚠️  Failed to set price: {price_error}")
+                        
+                        # Step 4: Set inventory for this SKU in all warehouses
+                        # Inventory is set to 100 for all available warehouses
+                        try:
+                            inventory_results = self.vtex_client.set_sku_inventory_all_warehouses(
+                                sku_id=sku_id,
+                                quantity=100  # Set to 100 for all warehouses
+                            )
+                            successful_warehouses = sum(1 for r in inventory_results.values() if r.get("success", False))
+                            print(f"       📦 Inventory set to 100 in {successful_warehouses}/{len(inventory_results)} warehouse(s)")
+                        except Exception as inventory_error:
+                            self.logger.warning("Could not set inventory for SKU %s: %s", sku_id, inventory_error)
+                            print(f"       ⚠️  Failed to set inventory: {inventory_error}")
+                    
+                except Exception as e:
+                    self.logger.error("Error processing product %d: %s", i, e, exc_info=True)
+                    print(f"     ⚠️  Error processing product: {e}")
+                    continue
         
-        # Save product/SKU state
-        save_state("vtex_products_skus", vtex_products)
+        # Fold categories created on demand (checkpointed per entity) into the tree snapshot
+        vtex_category_tree = self.vtex_category_tree_agent._save_snapshot()
         
-        # Format image results
-        vtex_images = self.vtex_image_agent._format_output()
+        # Save product/SKU state (supersedes any checkpoint log left by an interrupted batch run)
+        vtex_products = self.vtex_product_sku_agent._save_snapshot()
         
-        # Save image state
-        save_state("vtex_images", vtex_images)
+        # Save image state (folds the per-SKU checkpoint log into the snapshot)
+        vtex_images = self.vtex_image_agent._save_snapshot()
         
         # Save execution summary
         save_state("execution", {
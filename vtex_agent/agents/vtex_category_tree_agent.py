@@ -1,12 +1,66 @@
 """VTEX Category Tree Agent - Creates and manages VTEX category hierarchy."""
-from typing import Dict, Any, List, Optional, Tuple
-import time
+from typing import Dict, Any, List, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor, Future
+from itertools import islice
 
 from ..clients.vtex_client import VTEXClient
-from ..utils.state_manager import save_state, load_state
+from ..utils.state_manager import (
+    save_state,
+    load_state,
+    append_checkpoint,
+    load_checkpoints,
+    clear_checkpoints,
+)
 from ..utils.logger import get_agent_logger
 from ..utils.validation import normalize_category_name, normalize_brand_name
 from ..utils.error_handler import retry_with_exponential_backoff
+from ..utils.rate_limiter import TokenBucket
+
+# Upper bound on concurrent VTEX create calls while building the tree
+MAX_CONCURRENT_REQUESTS = 8
+
+# self.categories is nested as parent_id -> normalized_name -> record; state files keep the
+# flat "parent_id::name" keys
+CategoryKey = Tuple[int, str]
+
+
+def _category_key_to_str(key: CategoryKey) -> str:
+    """Serialize a (parent_id, name) category key for JSON output."""
+    return f"{key[0]}::{key[1]}"
+
+
+def _category_key_from_str(key: str) -> CategoryKey:
+    """Parse a "parent_id::name" key from state back into a (parent_id, name) tuple."""
+    parent, _, name = key.partition("::")
+    try:
+        return (int(parent), name)
+    except ValueError:
+        return (parent, name)
+
+
+def _normalized_category_name(cat_info: Dict[str, Any], default: str = "") -> str:
+    """
+    Normalized Name of a product category entry ("default" when it has no Name). The entry
+    is not modified; repeat names are served by normalize_category_name's memo.
+    """
+    return normalize_category_name(cat_info.get("Name", default))
+
+
+def _is_active_and_visible(cat: Dict[str, Any]) -> bool:
+    """True if a VTEX category dict already carries the flags _ensure_category_active_and_visible sets."""
+    return (
+        cat.get("IsActive") is True
+        and cat.get("ShowInStoreFront") is True
+        and cat.get("ActiveStoreFrontLink") is True
+        and cat.get("GlobalCategoryId") == 1
+    )
+
+
+# Category names ignored when matching a product's path against the tree
+SKIP_CATEGORY_NAMES = frozenset(("home", "root", "default"))
+
+# Fold the checkpoint log into a full state snapshot after this many new entities
+CHECKPOINT_SNAPSHOT_EVERY = 100
 
 
 class VTEXCategoryTreeAgent:
@@ -18,8 +72,36 @@ class VTEXCategoryTreeAgent:
         
         # Track created entities
         self.departments = {}
-        self.categories = {}
+        self.categories: Dict[int, Dict[str, Dict[str, Any]]] = {}
         self.brands = {}
+        
+        # Paces create/update calls (shared by worker threads); cache hits never wait
+        self._rate = TokenBucket(rate=5, capacity=10)
+        
+        # VTEX listings, fetched once per agent and extended with entities created here
+        self._categories_cache: Optional[List[Dict[str, Any]]] = None
+        self._brands_cache: Optional[List[Dict[str, Any]]] = None
+        
+        # Number of cached category entries already merged into the tree by _sync_tree_from_vtex
+        self._synced_count = 0
+        
+        # Category IDs already activated (or seen active in VTEX) during this run, and IDs
+        # queued by the batch tree build to be activated concurrently
+        self._activated: Set[int] = set()
+        self._pending_activations: Set[int] = set()
+        
+        # Running "created" counts for the output summary (see _recount_created)
+        self._created_counts = {"departments": 0, "categories": 0, "brands": 0}
+        
+        # Case-insensitive brand lookup index (see _brand_ids_by_lc)
+        self._brand_ids_lc: Dict[str, Any] = {}
+        self._brand_ids_lc_size = -1
+        
+        # Leaf category ID per product URL, filled while building the tree
+        self._product_to_category_id: Dict[str, int] = {}
+        
+        # New entities appended to the checkpoint log since the last snapshot
+        self._pending_checkpoints = 0
     
     def create_category_tree(self, legacy_site_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -39,83 +121,472 @@ class VTEXCategoryTreeAgent:
         if state and state.get("departments"):
             self.logger.info("Loaded category tree from state; will extend with current products")
             self.departments = state.get("departments", {})
-            self.categories = state.get("categories", {})
+            self.categories = {}
+            for key, cat_data in state.get("categories", {}).items():
+                self._set_category(*_category_key_from_str(key), cat_data)
             self.brands = state.get("brands", {})
+        self._replay_checkpoints()
+        # State written before "name_lc" existed
+        for dept_data in self.departments.values():
+            if "name_lc" not in dept_data:
+                dept_data["name_lc"] = (dept_data.get("name") or "").strip().lower()
+        self._recount_created()
         
         products = legacy_site_data.get("products", [])
-        self.logger.info(f"Processing {len(products)} products for category tree")
-        
-        # Evaluate existing VTEX structure (avoid creating duplicates)
-        existing_categories = self._evaluate_existing_categories()
-        existing_brands = self._evaluate_existing_brands()
+        self.logger.info("Processing %s products for category tree", len(products))
         
-        # Process all products to build/extend category tree (creates missing depts/cats/brands)
-        for product in products:
-            self._process_product_categories(product, existing_categories)
-            self._process_product_brand(product, existing_brands)
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+            # Evaluate existing VTEX structure (avoid creating duplicates). Both listings are
+            # fetched concurrently while the products are scanned locally.
+            categories_future = executor.submit(self._evaluate_existing_categories)
+            brands_future = executor.submit(self._evaluate_existing_brands)
+            
+            # Collect unique departments / category paths / brands, then create what is missing.
+            # Brands have no dependencies and run alongside departments; categories are created
+            # level by level because each level needs its parent IDs.
+            dept_names, category_paths, brand_names, product_paths = self._collect_unique_entities(products)
+            existing_categories, existing_by_parent = categories_future.result()
+            existing_brands = brands_future.result()
+            
+            brand_futures = self._submit_missing_brands(executor, brand_names, existing_brands)
+            self._create_departments(executor, dept_names, existing_categories)
+            resolved = self._create_category_levels(executor, category_paths, existing_by_parent)
+            self._activate_pending(executor)
+            self._collect_created_brands(brand_futures)
+        self._index_product_categories(product_paths, resolved)
         
         # Save output
-        output = self._format_output()
-        save_state("vtex_category_tree", output)
+        output = self._save_snapshot()
         
-        self.logger.info(f"Category tree creation complete. Created {len(self.departments)} departments, {len(self.categories)} categories, {len(self.brands)} brands")
+        self.logger.info(
+            "Category tree creation complete. Created %s departments, %s categories, %s brands",
+            len(self.departments), self._category_count(), len(self.brands)
+        )
         
         return output
     
-    def _evaluate_existing_categories(self) -> Dict[str, Dict[str, Any]]:
-        """Evaluate existing categories in VTEX (name -> cat). Use for backward compatibility."""
-        self.logger.info("Evaluating existing VTEX categories")
-        existing = {}
+    def _collect_unique_entities(
+        self,
+        products: List[Dict[str, Any]]
+    ) -> Tuple[List[str], Dict[Tuple[str, ...], Any], List[str], Dict[str, Tuple[str, ...]]]:
+        """
+        Walk products once and collect unique department names, category paths and brand names.
+        
+        Category paths are tuples of normalized names starting at the department, mapped to
+        the Level of their last element. A product with a single category contributes the
+        one-element path (department,), since the department serves as its category.
+        
+        Products sharing a raw category path or brand are skipped after the first one, and
+        each distinct raw name is normalized only once.
+        
+        Also returns each product's full category path keyed by product URL.
+        """
+        dept_names: Dict[str, None] = {}
+        category_paths: Dict[Tuple[str, ...], Any] = {}
+        brand_names: Dict[str, None] = {}
+        product_paths: Dict[str, Tuple[str, ...]] = {}
+        seen_raw_paths: Dict[Tuple[Any, ...], Optional[Tuple[str, ...]]] = {}
+        seen_raw_brands = set()
+        normalized_names: Dict[Any, str] = {}
+        
+        def _normalize(raw_name: Any) -> str:
+            cat_name = normalized_names.get(raw_name)
+            if cat_name is None:
+                cat_name = normalize_category_name(raw_name)
+                normalized_names[raw_name] = cat_name
+            return cat_name
+        
+        for product in products:
+            categories_list = product.get("categories", [])
+            if not categories_list:
+                category = product.get("category", {})
+                categories_list = [category] if category else []
+            
+            if categories_list:
+                raw_path = (categories_list[0].get("Name", "Default"),) + tuple(
+                    cat_info.get("Name", "") for cat_info in islice(categories_list, 1, None)
+                )
+                if raw_path not in seen_raw_paths:
+                    path = None
+                    dept_name = _normalize(raw_path[0])
+                    if dept_name:
+                        dept_names.setdefault(dept_name)
+                        path = (dept_name,)
+                        if len(categories_list) == 1:
+                            category_paths.setdefault(path, 1)
+                        for raw_name, cat_info in zip(islice(raw_path, 1, None), islice(categories_list, 1, None)):
+                            cat_name = _normalize(raw_name)
+                            if not cat_name:
+                                continue
+                            path = path + (cat_name,)
+                            category_paths.setdefault(path, cat_info.get("Level", 2))
+                    seen_raw_paths[raw_path] = path
+                path = seen_raw_paths[raw_path]
+                if path and product.get("url"):
+                    product_paths[product["url"]] = path
+            
+            brand = product.get("brand") or {}
+            raw_brand = brand.get("Name", "Default")
+            if raw_brand not in seen_raw_brands:
+                seen_raw_brands.add(raw_brand)
+                brand_name = normalize_brand_name(raw_brand)
+                if brand_name and brand_name != "Default":
+                    brand_names.setdefault(brand_name)
+        
+        return list(dept_names), category_paths, list(brand_names), product_paths
+    
+    def _create_department_safe(self, dept_name: str) -> Optional[Dict[str, Any]]:
+        """Create a department in VTEX, logging (not raising) errors. Safe to run in a worker thread."""
         try:
-            categories = self.vtex_client.list_categories()
-            for cat in categories:
-                if isinstance(cat, dict):
-                    name = cat.get("Name", "")
-                    if name:
-                        normalized = normalize_category_name(name)
-                        existing[normalized] = cat
+            self._rate.acquire()
+            dept = self.vtex_client.create_department(dept_name)
+            self._remember_created_category(dept, None)
+            return dept if isinstance(dept, dict) else None
         except Exception as e:
-            self.logger.warning(f"Error evaluating existing categories: {e}")
-        self.logger.info(f"Found {len(existing)} existing categories")
-        return existing
-
-    def _existing_categories_by_parent(self) -> Dict[tuple, Dict[str, Any]]:
-        """Return existing categories keyed by (parent_id int, normalized_name) so we only reuse under correct parent."""
-        by_parent = {}
+            self.logger.error("Error creating department %s: %s", dept_name, e)
+            return None
+    
+    def _create_category_safe(self, cat_name: str, parent_id: int, level: Any) -> Optional[Dict[str, Any]]:
+        """Create a category in VTEX, logging (not raising) errors. Safe to run in a worker thread."""
         try:
-            categories = self.vtex_client.list_categories()
-            for cat in categories:
-                if not isinstance(cat, dict):
+            self._rate.acquire()
+            cat = self.vtex_client.create_category(cat_name, father_category_id=parent_id)
+            self._remember_created_category(cat, parent_id)
+            return cat if isinstance(cat, dict) else None
+        except Exception as e:
+            self.logger.error("Error creating category %s: %s", cat_name, e)
+            return None
+    
+    def _create_brand_safe(self, brand_name: str) -> Optional[Dict[str, Any]]:
+        """Create a brand in VTEX, logging (not raising) errors. Safe to run in a worker thread."""
+        try:
+            self._rate.acquire()
+            brand_obj = self.vtex_client.create_brand(brand_name)
+            self._remember_created_brand(brand_obj)
+            return brand_obj if isinstance(brand_obj, dict) else None
+        except Exception as e:
+            self.logger.error("Error creating brand %s: %s", brand_name, e)
+            return None
+    
+    def _create_departments(
+        self,
+        executor: ThreadPoolExecutor,
+        dept_names: List[str],
+        existing_categories: Dict[str, Dict[str, Any]]
+    ) -> None:
+        """Resolve departments from the tree or VTEX, creating the missing ones concurrently."""
+        missing = []
+        for dept_name in dept_names:
+            if dept_name in self.departments:
+                continue
+            if dept_name in existing_categories:
+                dept_id = existing_categories[dept_name].get("Id")
+                if dept_id:
+                    self.departments[dept_name] = {
+                        "id": dept_id,
+                        "name": dept_name,
+                        "name_lc": dept_name.lower(),
+                        "created": False
+                    }
+                    self.logger.debug("Using existing department: %s (ID: %s)", dept_name, dept_id)
+                continue
+            missing.append(dept_name)
+        
+        if missing:
+            print(f"     📁 Creating {len(missing)} department(s)...")
+        for dept_name, dept in zip(missing, executor.map(self._create_department_safe, missing)):
+            dept_id = dept.get("Id") if dept else None
+            if dept_id:
+                self.departments[dept_name] = {
+                    "id": dept_id,
+                    "name": dept_name,
+                    "name_lc": dept_name.lower(),
+                    "created": True
+                }
+                self._checkpoint("departments", dept_name)
+                self.logger.info("Created department: %s (ID: %s)", dept_name, dept_id)
+            else:
+                self.logger.warning("Could not get department ID for: %s", dept_name)
+        
+        for dept_name in dept_names:
+            if dept_name in self.departments:
+                self._pending_activations.add(self.departments[dept_name]["id"])
+    
+    def _create_category_levels(
+        self,
+        executor: ThreadPoolExecutor,
+        category_paths: Dict[Tuple[str, ...], Any],
+        existing_by_parent: Dict[tuple, Dict[str, Any]]
+    ) -> Dict[Tuple[str, ...], int]:
+        """
+        Resolve category paths level by level, creating missing categories concurrently
+        within each level. Paths whose parent could not be resolved are skipped.
+        
+        Existing VTEX categories are matched on (parent ID, name), and each missing
+        (parent ID, name) is created once per level even when several paths lead to it
+        (e.g. A > X > Y and B > X > Y when A > X and B > X are the same VTEX category).
+        
+        Args:
+            executor: Pool for the create calls
+            category_paths: Unique category paths (department first) mapped to their level
+            existing_by_parent: VTEX listing indexed by (parent ID, normalized name)
+            
+        Returns:
+            Mapping of resolved category path to its VTEX category ID
+        """
+        resolved: Dict[Tuple[str, ...], int] = {
+            (dept_name,): dept_data["id"] for dept_name, dept_data in self.departments.items()
+        }
+        
+        # Single-category products: the department serves as the category
+        for path in category_paths:
+            if len(path) != 1 or path not in resolved:
+                continue
+            dept_name = path[0]
+            dept_id = resolved[path]
+            if self._get_category(dept_id, dept_name) is None:
+                self._set_category(dept_id, dept_name, {
+                    "id": dept_id,
+                    "name": dept_name,
+                    "parent_id": None,
+                    "level": 1,
+                    "created": False,
+                    "path": dept_name
+                })
+        
+        # Bucket paths by depth once, so each level only visits its own paths
+        paths_by_depth: Dict[int, List[Tuple[Tuple[str, ...], Any]]] = {}
+        for path, level in category_paths.items():
+            if len(path) > 1:
+                paths_by_depth.setdefault(len(path), []).append((path, level))
+        
+        for depth in sorted(paths_by_depth):
+            # (parent ID, name) -> (level, paths) for categories missing at this depth
+            to_create: Dict[Tuple[int, str], Tuple[Any, List[Tuple[str, ...]]]] = {}
+            for path, level in paths_by_depth[depth]:
+                parent_id = resolved.get(path[:-1])
+                if parent_id is None:
                     continue
-                name = cat.get("Name", "") or cat.get("name", "")
-                if not name:
+                cat_name = path[-1]
+                cat_entry = self._get_category(parent_id, cat_name)
+                
+                if cat_entry is not None:
+                    resolved[path] = cat_entry["id"]
+                    self._pending_activations.add(resolved[path])
                     continue
-                raw = cat.get("FatherCategoryId") or cat.get("FatherCategoryID") or 0
-                try:
-                    parent_id = int(raw) if raw not in (None, "") else 0
-                except (TypeError, ValueError):
-                    parent_id = 0
-                normalized = normalize_category_name(name)
-                by_parent[(parent_id, normalized)] = cat
+                
+                existing_cat = existing_by_parent.get((parent_id, cat_name))
+                cat_id = existing_cat.get("Id") if existing_cat else None
+                if cat_id:
+                    self._pending_activations.add(cat_id)
+                    self._set_category(parent_id, cat_name, {
+                        "id": cat_id,
+                        "name": cat_name,
+                        "parent_id": parent_id,
+                        "level": level,
+                        "created": False,
+                        "path": " > ".join(path)
+                    })
+                    resolved[path] = cat_id
+                    continue
+                
+                to_create.setdefault((parent_id, cat_name), (level, []))[1].append(path)
+            
+            if to_create:
+                print(f"     📂 Creating {len(to_create)} category(ies) at depth {depth}...")
+            results = executor.map(
+                lambda item: self._create_category_safe(item[0][1], item[0][0], item[1][0]),
+                to_create.items()
+            )
+            for ((parent_id, cat_name), (level, paths)), cat in zip(to_create.items(), results):
+                cat_id = cat.get("Id") if cat else None
+                if not cat_id:
+                    self.logger.warning("Could not get category ID for: %s", cat_name)
+                    continue
+                self._pending_activations.add(cat_id)
+                self._set_category(parent_id, cat_name, {
+                    "id": cat_id,
+                    "name": cat_name,
+                    "parent_id": parent_id,
+                    "level": level,
+                    "created": True,
+                    "path": " > ".join(paths[0])
+                })
+                self._checkpoint("categories", (parent_id, cat_name))
+                for path in paths:
+                    resolved[path] = cat_id
+                self.logger.info("Created category: %s (ID: %s)", cat_name, cat_id)
+        
+        return resolved
+    
+    def _index_product_categories(
+        self,
+        product_paths: Dict[str, Tuple[str, ...]],
+        resolved: Dict[Tuple[str, ...], int]
+    ) -> None:
+        """
+        Record the leaf category ID of every product whose full path was resolved, so
+        get_category_id_for_product can answer without walking the tree. Paths containing
+        names the walk skips are left to the walk.
+        """
+        for url, path in product_paths.items():
+            if SKIP_CATEGORY_NAMES.intersection(path):
+                continue
+            category_id = resolved.get(path)
+            if category_id is not None:
+                self._product_to_category_id[url] = category_id
+    
+    def _submit_missing_brands(
+        self,
+        executor: ThreadPoolExecutor,
+        brand_names: List[str],
+        existing_brands: Dict[str, Dict[str, Any]]
+    ) -> List[Tuple[str, Future]]:
+        """Resolve known brands and submit creation of missing ones; returns pending futures."""
+        pending = []
+        for brand_name in brand_names:
+            if brand_name in self.brands:
+                continue
+            if brand_name in existing_brands:
+                brand_id = existing_brands[brand_name].get("Id")
+                if brand_id:
+                    self.brands[brand_name] = {
+                        "id": brand_id,
+                        "name": brand_name,
+                        "created": False
+                    }
+                    self.logger.debug("Using existing brand: %s (ID: %s)", brand_name, brand_id)
+                continue
+            pending.append((brand_name, executor.submit(self._create_brand_safe, brand_name)))
+        if pending:
+            print(f"     🏷️  Creating {len(pending)} brand(s)...")
+        return pending
+    
+    def _collect_created_brands(self, brand_futures: List[Tuple[str, Future]]) -> None:
+        """Record brands whose creation was submitted by _submit_missing_brands."""
+        for brand_name, future in brand_futures:
+            brand_obj = future.result()
+            brand_id = brand_obj.get("Id") if brand_obj else None
+            if brand_id:
+                self.brands[brand_name] = {
+                    "id": brand_id,
+                    "name": brand_name,
+                    "created": True
+                }
+                self._checkpoint("brands", brand_name)
+                self.logger.info("Created brand: %s (ID: %s)", brand_name, brand_id)
+            else:
+                self.logger.warning("Could not get brand ID for: %s", brand_name)
+    
+    def _list_categories_cached(self) -> List[Dict[str, Any]]:
+        """
+        VTEX category list, fetched once and reused by the evaluate/sync helpers.
+        An empty or failed listing is not cached, so the next call retries.
+        """
+        if self._categories_cache is None:
+            categories = self.vtex_client.list_categories()
+            if not categories:
+                return categories
+            self._categories_cache = categories
+        return self._categories_cache
+    
+    def _invalidate_category_listing(self) -> None:
+        """Drop the cached VTEX category listing so the next lookup or sync refetches it."""
+        self._categories_cache = None
+        self._synced_count = 0
+    
+    def _list_brands_cached(self) -> List[Dict[str, Any]]:
+        """VTEX brand list, fetched once and reused (empty listings are not cached)."""
+        if self._brands_cache is None:
+            brands = self.vtex_client.list_brands()
+            if not brands:
+                return brands
+            self._brands_cache = brands
+        return self._brands_cache
+    
+    def _remember_created_category(self, cat: Any, parent_id: Optional[int]) -> None:
+        """Add a category returned by a create call to the cached listing, if one is loaded."""
+        if not isinstance(cat, dict) or not cat.get("Id"):
+            return
+        if _is_active_and_visible(cat):
+            self._activated.add(cat["Id"])
+        if self._categories_cache is None:
+            return
+        entry = dict(cat)
+        if entry.get("FatherCategoryId") is None:
+            entry["FatherCategoryId"] = parent_id
+        self._categories_cache.append(entry)
+    
+    def _remember_created_brand(self, brand_obj: Any) -> None:
+        """Add a brand returned by a create call to the cached listing, if one is loaded."""
+        if self._brands_cache is None or not isinstance(brand_obj, dict) or not brand_obj.get("Id"):
+            return
+        self._brands_cache.append(brand_obj)
+    
+    def _build_category_indexes(self) -> Tuple[Dict[str, Dict[str, Any]], Dict[tuple, Dict[str, Any]]]:
+        """
+        Index the VTEX category listing in a single pass.
+        
+        Returns:
+            Tuple of (normalized_name -> cat, (parent_id int, normalized_name) -> cat)
+        """
+        by_name = {}
+        by_parent = {}
+        for cat in self._list_categories_cached():
+            if not isinstance(cat, dict):
+                continue
+            name = cat.get("Name", "") or cat.get("name", "")
+            if not name:
+                continue
+            raw = cat.get("FatherCategoryId") or cat.get("FatherCategoryID") or 0
+            try:
+                parent_id = int(raw) if raw not in (None, "") else 0
+            except (TypeError, ValueError):
+                parent_id = 0
+            normalized = normalize_category_name(name)
+            by_name[normalized] = cat
+            by_parent[(parent_id, normalized)] = cat
+            if cat.get("Id") and _is_active_and_visible(cat):
+                self._activated.add(cat["Id"])
+        return by_name, by_parent
+
+    def _evaluate_existing_categories(self) -> Tuple[Dict[str, Dict[str, Any]], Dict[tuple, Dict[str, Any]]]:
+        """
+        Evaluate existing categories in VTEX.
+        
+        Returns:
+            Tuple of (normalized_name -> cat, (parent_id, normalized_name) -> cat); both
+            empty if the listing fails
+        """
+        self.logger.info("Evaluating existing VTEX categories")
+        existing, existing_by_parent = {}, {}
+        try:
+            existing, existing_by_parent = self._build_category_indexes()
         except Exception as e:
-            self.logger.warning(f"Error building categories by parent: {e}")
-        return by_parent
+            self.logger.warning("Error evaluating existing categories: %s", e)
+        self.logger.info("Found %s existing categories", len(existing))
+        return existing, existing_by_parent
 
     def _sync_tree_from_vtex(self) -> None:
         """
         Merge VTEX category tree into self.departments and self.categories.
         Only merges in categories from the API; does not clear existing tree if API returns empty or wrong shape.
+        Entries already in the tree are kept as they are (so "created" flags survive a full re-sync).
+        The cached listing is append-only, so only entries added since the previous sync are merged;
+        when nothing changed this returns immediately. _invalidate_category_listing forces a refetch.
         """
         try:
-            categories = self.vtex_client.list_categories()
+            categories = self._list_categories_cached()
         except Exception as e:
-            self.logger.warning(f"Could not list categories from VTEX for sync: {e}")
+            self.logger.warning("Could not list categories from VTEX for sync: %s", e)
             return
-        if not isinstance(categories, list) or not categories:
+        if not isinstance(categories, list) or len(categories) <= self._synced_count:
             return
+        delta = categories[self._synced_count:]
+        self._synced_count = len(categories)
         new_departments = {}
         new_categories = {}
-        for cat in categories:
+        for cat in delta:
             if not isinstance(cat, dict):
                 continue
             cat_id = cat.get("Id")
@@ -135,14 +606,16 @@ class VTEXCategoryTreeAgent:
                     parent_id = int(raw_parent)
                 except (TypeError, ValueError):
                     parent_id = 0
-            if parent_id == 0:
+            if parent_id == 0 and normalized not in self.departments:
                 new_departments[normalized] = {
                     "id": cat_id,
                     "name": normalized,
+                    "name_lc": normalized.lower(),
                     "created": False,
                 }
-            cat_key = f"{parent_id}::{normalized}"
-            new_categories[cat_key] = {
+            if self._get_category(parent_id, normalized) is not None:
+                continue
+            new_categories[(parent_id, normalized)] = {
                 "id": cat_id,
                 "name": normalized,
                 "parent_id": parent_id,
@@ -151,11 +624,14 @@ class VTEXCategoryTreeAgent:
                 "path": normalized,
             }
         if new_categories:
-            self.categories.update(new_categories)
-            self.logger.info(f"Synced {len(new_categories)} categories from VTEX")
+            for (parent_id, normalized), cat_data in new_categories.items():
+                self._set_category(parent_id, normalized, cat_data)
+            self.logger.info("Synced %s categories from VTEX", len(new_categories))
         if new_departments:
             self.departments.update(new_departments)
-            self.logger.info(f"Synced {len(new_departments)} departments from VTEX")
+            self.logger.info("Synced %s departments from VTEX", len(new_departments))
+        if new_categories or new_departments:
+            self._recount_created()
     
     def _evaluate_existing_brands(self) -> Dict[str, Dict[str, Any]]:
         """Evaluate existing brands in VTEX."""
@@ -163,7 +639,7 @@ class VTEXCategoryTreeAgent:
         existing = {}
         
         try:
-            brands = self.vtex_client.list_brands()
+            brands = self._list_brands_cached()
             for brand in brands:
                 if isinstance(brand, dict):
                     name = brand.get("Name", "")
@@ -171,16 +647,28 @@ class VTEXCategoryTreeAgent:
                         normalized = normalize_brand_name(name)
                         existing[normalized] = brand
         except Exception as e:
-            self.logger.warning(f"Error evaluating existing brands: {e}")
+            self.logger.warning("Error evaluating existing brands: %s", e)
         
-        self.logger.info(f"Found {len(existing)} existing brands")
+        self.logger.info("Found %s existing brands", len(existing))
         return existing
     
+    def _activate_pending(self, executor: ThreadPoolExecutor) -> None:
+        """Run the queued activation updates on the pool (each is a GET+PUT to VTEX)."""
+        pending = self._pending_activations - self._activated
+        self._pending_activations = set()
+        list(executor.map(self._ensure_category_active_and_visible, pending))
+    
     def _ensure_category_active_and_visible(self, category_id: int) -> None:
-        """Ensure category is active and visible in VTEX (IsActive, ShowInStoreFront, ActiveStoreFrontLink)."""
-        if not category_id:
+        """
+        Ensure category is active and visible in VTEX (IsActive, ShowInStoreFront, ActiveStoreFrontLink).
+        Each category is updated at most once per run; categories listed or created with the
+        flags already set are skipped.
+        """
+        if not category_id or category_id in self._activated:
             return
+        self._activated.add(category_id)
         try:
+            self._rate.acquire()
             self.vtex_client.update_category(
                 category_id,
                 is_active=True,
@@ -188,9 +676,9 @@ class VTEXCategoryTreeAgent:
                 active_store_front_link=True,
                 global_category_id=1,
             )
-            self.logger.debug(f"Ensured category {category_id} is active and visible")
+            self.logger.debug("Ensured category %s is active and visible", category_id)
         except Exception as e:
-            self.logger.warning(f"Could not set category {category_id} active/visible: {e}")
+            self.logger.warning("Could not set category %s active/visible: %s", category_id, e)
     
     def _process_product_categories(
         self,
@@ -213,38 +701,42 @@ class VTEXCategoryTreeAgent:
         
         # First category becomes department
         dept_info = categories_list[0]
-        dept_name = normalize_category_name(dept_info.get("Name", "Default"))
+        dept_name = _normalized_category_name(dept_info, "Default")
         
-        # Create/get department
-        if dept_name not in self.departments:
+        # Create/get department (one lookup per map)
+        if self.departments.get(dept_name) is None:
             # Check if exists in VTEX
-            if dept_name in existing_categories:
-                dept_data = existing_categories[dept_name]
+            dept_data = existing_categories.get(dept_name)
+            if dept_data is not None:
                 dept_id = dept_data.get("Id")
                 if dept_id:
                     self.departments[dept_name] = {
                         "id": dept_id,
                         "name": dept_name,
+                        "name_lc": dept_name.lower(),
                         "created": False
                     }
-                    self.logger.debug(f"Using existing department: {dept_name} (ID: {dept_id})")
+                    self.logger.debug("Using existing department: %s (ID: %s)", dept_name, dept_id)
             else:
                 # Create new department
                 try:
-                    print(f"     📁 Creating department: {dept_name}")
+                    self._rate.acquire()
                     dept = self.vtex_client.create_department(dept_name)
+                    self._remember_created_category(dept, None)
                     dept_id = dept.get("Id") if isinstance(dept, dict) else None
                     if dept_id:
                         self.departments[dept_name] = {
                             "id": dept_id,
                             "name": dept_name,
+                            "name_lc": dept_name.lower(),
                             "created": True
                         }
-                        self.logger.info(f"Created department: {dept_name} (ID: {dept_id})")
+                        self._checkpoint("departments", dept_name)
+                        self.logger.info("Created department: %s (ID: %s)", dept_name, dept_id)
                     else:
-                        self.logger.warning(f"Could not get department ID for: {dept_name}")
+                        self.logger.warning("Could not get department ID for: %s", dept_name)
                 except Exception as e:
-                    self.logger.error(f"Error creating department {dept_name}: {e}")
+                    self.logger.error("Error creating department %s: %s", dept_name, e)
         
         # Create category tree
         parent_id = self.departments[dept_name]["id"]
@@ -252,77 +744,72 @@ class VTEXCategoryTreeAgent:
         
         # If only one category, department serves as category
         if len(categories_list) == 1:
-            cat_key = f"{parent_id}::{dept_name}"
-            if cat_key not in self.categories:
-                self.categories[cat_key] = {
+            if self._get_category(parent_id, dept_name) is None:
+                self._set_category(parent_id, dept_name, {
                     "id": parent_id,
                     "name": dept_name,
                     "parent_id": None,
                     "level": 1,
                     "created": False,
                     "path": dept_name
-                }
+                })
         else:
             # Process remaining categories (skip first, it's the department)
-            for cat_info in categories_list[1:]:
-                cat_name = normalize_category_name(cat_info.get("Name", ""))
+            for cat_info in islice(categories_list, 1, None):
+                cat_name = _normalized_category_name(cat_info)
                 if not cat_name:
                     continue
                 
-                cat_key = f"{parent_id}::{cat_name}"
+                cat_entry = self._get_category(parent_id, cat_name)
                 
-                if cat_key not in self.categories:
-                    # Check if exists in VTEX
-                    existing_cat = None
-                    for existing_name, existing_data in existing_categories.items():
-                        if existing_name == cat_name:
-                            existing_cat = existing_data
-                            break
+                if cat_entry is None:
+                    # Check if exists in VTEX (existing_categories is keyed by normalized name)
+                    existing_cat = existing_categories.get(cat_name)
                     
                     if existing_cat:
                         cat_id = existing_cat.get("Id")
                         if cat_id:
                             self._ensure_category_active_and_visible(cat_id)
-                            self.categories[cat_key] = {
+                            self._set_category(parent_id, cat_name, {
                                 "id": cat_id,
                                 "name": cat_name,
                                 "parent_id": parent_id,
                                 "level": cat_info.get("Level", 2),
                                 "created": False,
                                 "path": f"{dept_name} > {cat_name}"
-                            }
+                            })
                             parent_id = cat_id
                             continue
                     
                     # Create new category
                     try:
-                        print(f"     📂 Creating category: {cat_name} (Level {cat_info.get('Level', 2)})")
+                        self._rate.acquire()
                         cat = self.vtex_client.create_category(
                             cat_name,
                             father_category_id=parent_id
                         )
+                        self._remember_created_category(cat, parent_id)
                         cat_id = cat.get("Id") if isinstance(cat, dict) else None
                         if cat_id:
                             self._ensure_category_active_and_visible(cat_id)
-                            self.categories[cat_key] = {
+                            self._set_category(parent_id, cat_name, {
                                 "id": cat_id,
                                 "name": cat_name,
                                 "parent_id": parent_id,
                                 "level": cat_info.get("Level", 2),
                                 "created": True,
                                 "path": f"{dept_name} > {cat_name}"
-                            }
+                            })
+                            self._checkpoint("categories", (parent_id, cat_name))
                             parent_id = cat_id
-                            self.logger.info(f"Created category: {cat_name} (ID: {cat_id})")
+                            self.logger.info("Created category: %s (ID: %s)", cat_name, cat_id)
                         else:
-                            self.logger.warning(f"Could not get category ID for: {cat_name}")
+                            self.logger.warning("Could not get category ID for: %s", cat_name)
                     except Exception as e:
-                        self.logger.error(f"Error creating category {cat_name}: {e}")
+                        self.logger.error("Error creating category %s: %s", cat_name, e)
                 else:
-                    parent_id = self.categories[cat_key]["id"]
+                    parent_id = cat_entry["id"]
                     self._ensure_category_active_and_visible(parent_id)
-        
-        time.sleep(0.2)  # Rate limiting
     
     def _process_product_brand(
         self,
@@ -330,66 +817,147 @@ class VTEXCategoryTreeAgent:
         existing_brands: Dict[str, Dict[str, Any]]
     ):
         """Process brand for a single product."""
-        brand = product.get("brand", {})
-        brand_name = normalize_brand_name(brand.get("Name", "Default"))
+        raw_brand = (product.get("brand") or {}).get("Name")
+        if not raw_brand or raw_brand == "Default":
+            return
+        brand_name = normalize_brand_name(raw_brand)
         
-        if not brand_name or brand_name == "Default":
+        # Known brands (the common case) need no lookups or API calls
+        if not brand_name or brand_name == "Default" or brand_name in self.brands:
             return
         
-        if brand_name not in self.brands:
-            # Check if exists in VTEX
-            if brand_name in existing_brands:
-                brand_data = existing_brands[brand_name]
-                brand_id = brand_data.get("Id")
+        # Check if exists in VTEX
+        brand_data = existing_brands.get(brand_name)
+        if brand_data is not None:
+            brand_id = brand_data.get("Id")
+            if brand_id:
+                self.brands[brand_name] = {
+                    "id": brand_id,
+                    "name": brand_name,
+                    "created": False
+                }
+                self.logger.debug("Using existing brand: %s (ID: %s)", brand_name, brand_id)
+        else:
+            # Create new brand
+            try:
+                self._rate.acquire()
+                brand_obj = self.vtex_client.create_brand(brand_name)
+                self._remember_created_brand(brand_obj)
+                brand_id = brand_obj.get("Id") if isinstance(brand_obj, dict) else None
                 if brand_id:
                     self.brands[brand_name] = {
                         "id": brand_id,
                         "name": brand_name,
-                        "created": False
+                        "created": True
                     }
-                    self.logger.debug(f"Using existing brand: {brand_name} (ID: {brand_id})")
-            else:
-                # Create new brand
-                try:
-                    print(f"     🏷️  Creating brand: {brand_name}")
-                    brand_obj = self.vtex_client.create_brand(brand_name)
-                    brand_id = brand_obj.get("Id") if isinstance(brand_obj, dict) else None
-                    if brand_id:
-                        self.brands[brand_name] = {
-                            "id": brand_id,
-                            "name": brand_name,
-                            "created": True
-                        }
-                        self.logger.info(f"Created brand: {brand_name} (ID: {brand_id})")
-                    else:
-                        self.logger.warning(f"Could not get brand ID for: {brand_name}")
-                except Exception as e:
-                    self.logger.error(f"Error creating brand {brand_name}: {e}")
+                    self._checkpoint("brands", brand_name)
+                    self.logger.info("Created brand: %s (ID: %s)", brand_name, brand_id)
+                else:
+                    self.logger.warning("Could not get brand ID for: %s", brand_name)
+            except Exception as e:
+                self.logger.error("Error creating brand %s: %s", brand_name, e)
+    
+    def _get_category(self, parent_id: Any, cat_name: str) -> Optional[Dict[str, Any]]:
+        """Category record for a normalized name under parent_id, or None."""
+        children = self.categories.get(parent_id)
+        return children.get(cat_name) if children else None
+    
+    def _set_category(self, parent_id: Any, cat_name: str, cat_data: Dict[str, Any]) -> None:
+        """Store a category record under parent_id."""
+        children = self.categories.get(parent_id)
+        if children is None:
+            children = self.categories[parent_id] = {}
+        children[cat_name] = cat_data
+    
+    def _iter_categories(self):
+        """Yield ((parent_id, name), record) for every category, in insertion order per parent."""
+        for parent_id, children in self.categories.items():
+            for cat_name, cat_data in children.items():
+                yield (parent_id, cat_name), cat_data
+    
+    def _category_count(self) -> int:
+        """Total number of category records."""
+        return sum(len(children) for children in self.categories.values())
+    
+    def _checkpoint(self, kind: str, key: Any) -> None:
+        """
+        Append a newly created entity to the checkpoint log, so an interrupted run
+        can resume without recreating it. Compacts into a snapshot periodically.
         
-        time.sleep(0.2)  # Rate limiting
+        Args:
+            kind: Entity map name ('departments', 'categories' or 'brands')
+            key: Key of the entity in that map
+        """
+        if kind == "categories":
+            record = {"kind": kind, "key": _category_key_to_str(key), "data": self._get_category(*key)}
+        else:
+            record = {"kind": kind, "key": key, "data": getattr(self, kind)[key]}
+        append_checkpoint("vtex_category_tree", record)
+        self._created_counts[kind] += 1
+        self._pending_checkpoints += 1
+        if self._pending_checkpoints >= CHECKPOINT_SNAPSHOT_EVERY:
+            self._save_snapshot()
+    
+    def _replay_checkpoints(self) -> None:
+        """Apply entities from the checkpoint log on top of the loaded snapshot."""
+        records = load_checkpoints("vtex_category_tree")
+        for record in records:
+            kind = record.get("kind")
+            key = record.get("key")
+            if kind not in ("departments", "categories", "brands") or key is None:
+                continue
+            if kind == "categories":
+                self._set_category(*_category_key_from_str(key), record.get("data", {}))
+            else:
+                getattr(self, kind)[key] = record.get("data", {})
+        if records:
+            self.logger.info("Replayed %s checkpointed entities from previous run", len(records))
+    
+    def _recount_created(self) -> None:
+        """Recompute the created counters after entries were loaded or replaced in bulk."""
+        self._created_counts["departments"] = sum(1 for d in self.departments.values() if d.get("created"))
+        self._created_counts["categories"] = sum(
+            1 for _key, c in self._iter_categories() if c.get("created")
+        )
+        self._created_counts["brands"] = sum(1 for b in self.brands.values() if b.get("created"))
+    
+    def _save_snapshot(self) -> Dict[str, Any]:
+        """Write the full tree to state and truncate the checkpoint log it now covers."""
+        output = self._format_output()
+        save_state("vtex_category_tree", output)
+        clear_checkpoints("vtex_category_tree")
+        self._pending_checkpoints = 0
+        return output
     
     def _format_output(self) -> Dict[str, Any]:
         """Format output JSON."""
         return {
             "departments": self.departments,
-            "categories": self.categories,
+            "categories": {
+                _category_key_to_str(key): cat_data for key, cat_data in self._iter_categories()
+            },
             "brands": self.brands,
             "summary": {
                 "total_departments": len(self.departments),
-                "total_categories": len(self.categories),
+                "total_categories": self._category_count(),
                 "total_brands": len(self.brands),
-                "departments_created": sum(1 for d in self.departments.values() if d.get("created")),
-                "categories_created": sum(1 for c in self.categories.values() if c.get("created")),
-                "brands_created": sum(1 for b in self.brands.values() if b.get("created"))
+                "departments_created": self._created_counts["departments"],
+                "categories_created": self._created_counts["categories"],
+                "brands_created": self._created_counts["brands"]
             }
         }
     
     def get_category_id_for_product(self, product: Dict[str, Any]) -> Optional[int]:
         """
         Get the category ID for a product based on its category hierarchy.
-        Tries direct department match first, then fallback: try each department as root
-        and match the full path (so product [Linhas, BARES, X] resolves under department Início).
+        Uses the ID recorded while building the tree when available. Otherwise tries direct
+        department match first, then fallback: try each department as root and match the
+        full path (so product [Linhas, BARES, X] resolves under department Início).
         """
+        category_id = self._product_to_category_id.get(product.get("url"))
+        if category_id is not None:
+            return category_id
+        
         categories_list = product.get("categories", [])
         if not categories_list:
             category = product.get("category", {})
@@ -398,41 +966,40 @@ class VTEXCategoryTreeAgent:
         if not categories_list:
             return None
 
-        skip_names = {"home", "root", "default"}
+        skip_names = SKIP_CATEGORY_NAMES
 
         # 1) Direct: first category is a department
-        dept_name = normalize_category_name(categories_list[0].get("Name", "Default"))
+        dept_name = _normalized_category_name(categories_list[0], "Default")
         if dept_name not in skip_names and dept_name in self.departments:
             parent_id = self.departments[dept_name]["id"]
             if len(categories_list) == 1:
                 return parent_id
-            for cat_info in categories_list[1:]:
-                cat_name = normalize_category_name(cat_info.get("Name", ""))
+            for cat_info in islice(categories_list, 1, None):
+                cat_name = _normalized_category_name(cat_info)
                 if not cat_name or cat_name in skip_names:
                     continue
-                cat_key = f"{parent_id}::{cat_name}"
-                if cat_key in self.categories:
-                    parent_id = self.categories[cat_key]["id"]
+                cat_entry = self._get_category(parent_id, cat_name)
+                if cat_entry is not None:
+                    parent_id = cat_entry["id"]
                 else:
                     break
             return parent_id
 
-        # 2) Fallback: try each department as root and match full path (case-insensitive)
+        # 2) Fallback: try each department as root and match full path (case-insensitive).
+        # The path is normalized once; the department loop below only does dict lookups.
+        path_items = self._normalized_path_items(categories_list)
         for _dept_name, dept_data in self.departments.items():
             parent_id = dept_data["id"]
+            dept_name_lc = dept_data["name_lc"]
             matched_any = False
-            for cat_info in categories_list:
-                cat_name = (cat_info.get("Name") or "").strip()
-                if not cat_name or cat_name.lower() in skip_names:
-                    continue
-                cat_name_norm = normalize_category_name(cat_name)
-                cat_key = f"{parent_id}::{cat_name_norm}"
-                if cat_key in self.categories:
-                    parent_id = self.categories[cat_key]["id"]
+            for cat_name_norm, cat_name_lc in path_items:
+                cat_entry = self._get_category(parent_id, cat_name_norm)
+                if cat_entry is not None:
+                    parent_id = cat_entry["id"]
                     matched_any = True
                     continue
                 # Department name might match this level (single-level dept)
-                if (dept_data.get("name") or "").strip().lower() == cat_name_norm.lower():
+                if dept_name_lc == cat_name_lc:
                     parent_id = dept_data["id"]
                     matched_any = True
                 else:
@@ -442,29 +1009,44 @@ class VTEXCategoryTreeAgent:
 
         return None
 
+    @staticmethod
+    def _normalized_path_items(categories_list: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+        """
+        Normalize a product's category path once for the department-root matching loops.
+        Returns (normalized_name, lowercased_normalized_name) per entry, dropping empty
+        names and SKIP_CATEGORY_NAMES.
+        """
+        items = []
+        for cat_info in categories_list:
+            cat_name = (cat_info.get("Name") or "").strip()
+            if not cat_name or cat_name.lower() in SKIP_CATEGORY_NAMES:
+                continue
+            cat_name_norm = _normalized_category_name(cat_info)
+            items.append((cat_name_norm, cat_name_norm.lower()))
+        return items
+
     def _longest_path_prefix(self, categories_list: List[Dict[str, Any]]) -> tuple:
         """
         Find the longest path prefix that exists in the tree. Returns (parent_id, last_matched_index+1)
         so that categories_list[returned_index:] are the part we need to create. Returns (None, 0) if
-        no department matches.
+        no department matches. Each step is a single lookup in the parent_id -> name map, and the
+        search stops at the first department under which the whole path already exists.
         """
-        skip_names = {"home", "root", "default"}
+        path_items = self._normalized_path_items(categories_list)
+        full_length = len(path_items)
         best_parent = None
         best_index = -1
         for _dept_name, dept_data in self.departments.items():
             parent_id = dept_data["id"]
+            dept_name_lc = dept_data["name_lc"]
             idx = 0
-            for cat_info in categories_list:
-                cat_name = (cat_info.get("Name") or "").strip()
-                if not cat_name or cat_name.lower() in skip_names:
-                    continue
-                cat_name_norm = normalize_category_name(cat_name)
-                cat_key = f"{parent_id}::{cat_name_norm}"
-                if cat_key in self.categories:
-                    parent_id = self.categories[cat_key]["id"]
+            for cat_name_norm, cat_name_lc in path_items:
+                cat_entry = self._get_category(parent_id, cat_name_norm)
+                if cat_entry is not None:
+                    parent_id = cat_entry["id"]
                     idx += 1
                     continue
-                if (dept_data.get("name") or "").strip().lower() == cat_name_norm.lower():
+                if dept_name_lc == cat_name_lc:
                     parent_id = dept_data["id"]
                     idx += 1
                 else:
@@ -472,6 +1054,8 @@ class VTEXCategoryTreeAgent:
             if idx > best_index:
                 best_index = idx
                 best_parent = parent_id
+                if idx == full_length:
+                    break
         return (best_parent, best_index)
 
     def _create_category_chain(
@@ -488,12 +1072,12 @@ class VTEXCategoryTreeAgent:
         existing_by_parent = existing_by_parent or {}
         for i in range(start_index, len(categories_list)):
             cat_info = categories_list[i]
-            cat_name = normalize_category_name(cat_info.get("Name", ""))
+            cat_name = _normalized_category_name(cat_info)
             if not cat_name:
                 continue
-            cat_key = f"{parent_id}::{cat_name}"
-            if cat_key in self.categories:
-                parent_id = self.categories[cat_key]["id"]
+            cat_entry = self._get_category(parent_id, cat_name)
+            if cat_entry is not None:
+                parent_id = cat_entry["id"]
                 self._ensure_category_active_and_visible(parent_id)
                 continue
             parent_id_int = int(parent_id) if parent_id is not None else 0
@@ -502,40 +1086,41 @@ class VTEXCategoryTreeAgent:
                 cat_id = existing_cat.get("Id")
                 if cat_id:
                     self._ensure_category_active_and_visible(cat_id)
-                    self.categories[cat_key] = {
+                    self._set_category(parent_id, cat_name, {
                         "id": cat_id,
                         "name": cat_name,
                         "parent_id": parent_id,
                         "level": cat_info.get("Level", 2),
                         "created": False,
                         "path": f"{path_prefix} > {cat_name}".strip(" >") or cat_name,
-                    }
+                    })
                     parent_id = cat_id
                     continue
             try:
-                print(f"     📂 Creating category: {cat_name} (Level {cat_info.get('Level', 2)})")
+                self._rate.acquire()
                 cat = self.vtex_client.create_category(cat_name, father_category_id=parent_id)
+                self._remember_created_category(cat, parent_id)
                 cat_id = cat.get("Id") if isinstance(cat, dict) else None
                 if cat_id:
                     self._ensure_category_active_and_visible(cat_id)
-                    self.categories[cat_key] = {
+                    self._set_category(parent_id, cat_name, {
                         "id": cat_id,
                         "name": cat_name,
                         "parent_id": parent_id,
                         "level": cat_info.get("Level", 2),
                         "created": True,
                         "path": f"{path_prefix} > {cat_name}".strip(" >") or cat_name,
-                    }
+                    })
+                    self._checkpoint("categories", (parent_id, cat_name))
                     parent_id = cat_id
-                    self.logger.info(f"Created category: {cat_name} (ID: {cat_id})")
+                    self.logger.info("Created category: %s (ID: %s)", cat_name, cat_id)
                 else:
-                    self.logger.warning(f"Could not get category ID for: {cat_name}")
+                    self.logger.warning("Could not get category ID for: %s", cat_name)
                     return None
             except Exception as e:
-                self.logger.error(f"Error creating category {cat_name}: {e}")
+                self.logger.error("Error creating category %s: %s", cat_name, e)
                 return None
             path_prefix = f"{path_prefix} > {cat_name}".strip(" >")
-            time.sleep(0.2)
         return parent_id
 
     def ensure_category_for_product(self, product: Dict[str, Any]) -> Tuple[Optional[int], Dict[str, Any]]:
@@ -544,12 +1129,11 @@ class VTEXCategoryTreeAgent:
         the leaf category ID and the updated category tree.
         Call this when get_category_id_for_product returns None before creating the product.
         Re-syncs tree from VTEX first so we reassess what exists and create only what is missing
-        under the correct department.
+        under the correct department; on a miss the cached listing is refetched, so categories
+        created outside this agent are found before anything is created.
         Returns:
             Tuple of (category_id or None, updated_tree dict for vtex_category_tree)
         """
-        from ..utils.state_manager import save_state
-
         categories_list = product.get("categories", [])
         if not categories_list:
             category = product.get("category", {})
@@ -564,6 +1148,12 @@ class VTEXCategoryTreeAgent:
 
         # Already resolvable with current tree?
         category_id = self.get_category_id_for_product(product)
+        if category_id is None:
+            # The cached listing only knows what this agent created since it was fetched;
+            # refetch it so categories created elsewhere in the meantime are reused
+            self._invalidate_category_listing()
+            self._sync_tree_from_vtex()
+            category_id = self.get_category_id_for_product(product)
         if category_id is not None:
             self._ensure_category_active_and_visible(category_id)
             return category_id, self._format_output()
@@ -573,25 +1163,28 @@ class VTEXCategoryTreeAgent:
         )
         print("       📂 Category path missing in VTEX; creating/finding categories...")
         parent_id, start_index = self._longest_path_prefix(categories_list)
+        try:
+            existing_categories, existing_by_parent = self._build_category_indexes()
+        except Exception as e:
+            self.logger.warning("Error indexing existing categories: %s", e)
+            existing_categories, existing_by_parent = {}, {}
         if parent_id is None or start_index < 0:
             # No path at all - create from first category as department
-            existing_categories = self._evaluate_existing_categories()
             self._process_product_categories(product, existing_categories)
         else:
             # Create only the missing tail under the right parent
-            existing_by_parent = self._existing_categories_by_parent()
             path_prefix = ""
             for j in range(0, start_index):
-                path_prefix = f"{path_prefix} > {normalize_category_name(categories_list[j].get('Name', ''))}".strip(" >")
+                path_prefix = f"{path_prefix} > {_normalized_category_name(categories_list[j])}".strip(" >")
             leaf_id = self._create_category_chain(
                 categories_list, start_index, parent_id, existing_by_parent=existing_by_parent, path_prefix=path_prefix
             )
             if leaf_id is None:
                 self.logger.warning("_create_category_chain did not create; trying full path from first as department.")
-                existing_categories = self._evaluate_existing_categories()
                 self._process_product_categories(product, existing_categories)
+        # New entities were appended to the checkpoint log as they were created; the full
+        # snapshot is written by create_category_tree / the caller at the end of the run
         updated = self._format_output()
-        save_state("vtex_category_tree", updated)
         category_id = self.get_category_id_for_product(product)
         if category_id is not None:
             self._ensure_category_active_and_visible(category_id)
@@ -614,15 +1207,26 @@ class VTEXCategoryTreeAgent:
         if not normalized:
             return None
         
-        target = normalized.strip().lower()
-        
-        # Match against both stored keys and brand names in a case-insensitive way
-        for brand_key, brand_data in self.brands.items():
-            key_name = str(brand_key).strip().lower()
-            data_name = str(brand_data.get("name", "")).strip().lower()
-            
-            if target == key_name or target == data_name:
-                return brand_data.get("id")
+        # self.brands is keyed by normalized name, so the exact key is the common case
+        brand_data = self.brands.get(normalized)
+        if brand_data is not None:
+            return brand_data.get("id")
         
-        return None
+        # Case-insensitive match against stored keys and brand names
+        return self._brand_ids_by_lc().get(normalized.lower())
+    
+    def _brand_ids_by_lc(self) -> Dict[str, Any]:
+        """
+        Lowercased brand key/name -> brand ID. Rebuilt only when brands were added
+        since the last call (self.brands only grows).
+        """
+        if self._brand_ids_lc_size != len(self.brands):
+            index = {}
+            for brand_key, brand_data in self.brands.items():
+                brand_id = brand_data.get("id")
+                index.setdefault(str(brand_data.get("name", "")).strip().lower(), brand_id)
+                index.setdefault(str(brand_key).strip().lower(), brand_id)
+            self._brand_ids_lc = index
+            self._brand_ids_lc_size = len(self.brands)
+        return self._brand_ids_lc
 
@@ -1,13 +1,34 @@
 """VTEX Image Enrichment Agent - Processes images, uploads to GitHub, and associates with SKUs."""
-from typing import Dict, Any, List, Optional
-import time
+from typing import Dict, Any, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, Future
+import hashlib
 import os
+import threading
 
 from ..clients.vtex_client import VTEXClient
-from ..utils.state_manager import save_state, load_state
+from ..utils.state_manager import (
+    save_state,
+    load_state,
+    append_checkpoint,
+    load_checkpoints,
+    clear_checkpoints,
+)
 from ..utils.logger import get_agent_logger
+from ..utils.rate_limiter import TokenBucket
+from ..utils.console import buffered_stdout
 from ..tools.image_manager import process_and_upload_images_to_github
 
+# Upper bound on concurrent VTEX image association calls
+MAX_CONCURRENT_ASSOCIATIONS = 5
+
+# Products whose images are downloaded/uploaded in parallel by enrich_skus_with_images
+MAX_CONCURRENT_PRODUCTS = 4
+
+
+def _image_urls_hash(image_urls: List[str]) -> str:
+    """Fingerprint of a SKU's source image list, stored with its result to detect changes on re-runs."""
+    return hashlib.sha1(",".join(image_urls).encode("utf-8")).hexdigest()
+
 
 class VTEXImageAgent:
     """
@@ -26,6 +47,18 @@ class VTEXImageAgent:
         
         # Track image associations per SKU
         self.sku_image_associations = {}
+        
+        # GitHub uploads per (repo_path, image URLs), reused by other SKUs of the same product
+        self._uploads_by_urls: Dict[Tuple[str, Tuple[str, ...]], List[Dict[str, Any]]] = {}
+        
+        # Running summary totals over sku_image_associations (see _store_sku_result)
+        self._totals = {"images": 0, "associated": 0, "failed": 0}
+        
+        # Guards sku_image_associations and _totals when products are processed concurrently
+        self._results_lock = threading.Lock()
+        
+        # Paces VTEX association calls (shared by worker threads); calls under the limit go out immediately
+        self._rate = TokenBucket(rate=5, capacity=10)
     
     def enrich_skus_with_images(
         self,
@@ -53,176 +86,73 @@ class VTEXImageAgent:
         """
         self.logger.info("Starting SKU image enrichment")
         
-        # Try to load from state (but allow re-processing if needed)
-        state = load_state("vtex_images")
-        if state and state.get("sku_image_associations"):
+        # Try to load from state (but allow re-processing if needed). SKU results checkpointed
+        # after the last snapshot (e.g. by an interrupted run) are newer and take precedence.
+        state = load_state("vtex_images") or {}
+        saved_associations = dict(state.get("sku_image_associations", {}))
+        replayed = self._replay_checkpoints(saved_associations)
+        if saved_associations:
+            self.sku_image_associations = saved_associations
+            self._recount_totals()
             print("   ℹ️  Found existing image associations in state")
             # Show summary of what's in state
-            state_summary = state.get("summary", {})
-            print(f"      Total SKUs: {state_summary.get('total_skus', 0)}")
-            print(f"      Images associated: {state_summary.get('total_images_associated', 0)}")
-            print(f"      Images failed: {state_summary.get('total_images_failed', 0)}")
+            print(f"      Total SKUs: {len(self.sku_image_associations)}")
+            print(f"      Images associated: {self._totals['associated']}")
+            print(f"      Images failed: {self._totals['failed']}")
             
             # Check if we should re-process (if any SKU has failed status)
             failed_skus = [
-                sku_id for sku_id, assoc in state.get("sku_image_associations", {}).items()
+                sku_id for sku_id, assoc in saved_associations.items()
                 if assoc.get("status") == "failed"
             ]
             if failed_skus:
                 print(f"   🔄 Found {len(failed_skus)} failed SKU(s), re-processing...")
                 print(f"      Failed SKUs: {', '.join(failed_skus)}")
-                # Clear failed associations to re-process them
-                self.sku_image_associations = {}
+                # Keep completed SKUs; failed ones (and SKUs whose images changed) are re-processed
+                self.sku_image_associations = {
+                    sku_id: assoc for sku_id, assoc in saved_associations.items()
+                    if assoc.get("status") == "completed"
+                }
+                self._recount_totals()
             else:
                 print("   ✅ All SKUs processed successfully, using cached results")
                 print("   ℹ️  To force re-processing, delete state/vtex_images.json")
                 self.logger.info("Loaded image associations from state")
-                self.sku_image_associations = state.get("sku_image_associations", {})
+                if replayed:
+                    return self._save_snapshot()
                 return self._format_output()
         
         # Get products from legacy site
         products = legacy_site_data.get("products", [])
-        vtex_products_dict = vtex_products_skus.get("products", {})
-        
-        # Create mapping from product URL to VTEX product data
-        url_to_vtex_product = {}
-        for product_url, product_data in vtex_products_dict.items():
-            url_to_vtex_product[product_url] = product_data
+        # VTEX product data is already keyed by product URL
+        url_to_vtex_product = vtex_products_skus.get("products", {})
         
         total_skus_processed = 0
         total_images_associated = 0
         total_images_failed = 0
         
-        # Process each product
-        for product_data in products:
-            product_url = product_data.get("url", "")
-            vtex_product = url_to_vtex_product.get(product_url)
-            
-            if not vtex_product:
-                self.logger.warning(f"Could not find VTEX product for URL: {product_url}")
-                continue
-            
-            # Get SKUs for this product
-            skus = vtex_product.get("skus", [])
-            if not skus:
-                self.logger.warning(f"No SKUs found for product URL: {product_url}")
-                continue
-            
-            # Get images from legacy site
-            images = product_data.get("images", [])
-            if not images:
-                self.logger.info(f"No images found for product URL: {product_url}")
-                continue
-            
-            # Process each SKU
-            for sku_data in skus:
-                sku_id = sku_data.get("id")
-                if not sku_id:
-                    self.logger.warning(f"SKU data missing ID: {sku_data}")
-                    continue
-                
-                sku_name = sku_data.get("name", "Product Image")
-                print(f"\n   🖼️  Processing images for SKU ID {sku_id} ({sku_name})...")
-                self.logger.info(f"Processing {len(images)} images for SKU {sku_id}")
-                
-                total_skus_processed += 1
-                
-                # Download, rename, and upload images to GitHub
-                uploaded_images = process_and_upload_images_to_github(
-                    image_urls=images,
-                    sku_id=sku_id,
-                    repo_path=github_repo_path
-                )
-                
-                # Associate images with SKU in VTEX
-                associated_images = []
-                failed_count = 0
-                
-                for idx, img_info in enumerate(uploaded_images, start=1):
-                    if not img_info.get("url"):
-                        failed_count += 1
-                        total_images_failed += 1
-                        continue
-                    
-                    raw_github_url = img_info["url"]
-                    file_name = img_info["name"]
-                    is_main = (idx == 1)  # First image is main
-                    
-                    try:
-                        print(f"     [{idx}/{len(uploaded_images)}] Associating image with VTEX SKU...")
-                        
-                        result = self.vtex_client.associate_sku_image(
-                            sku_id=sku_id,
-                            image_url=raw_github_url,
-                            file_name=file_name,
-                            is_main=is_main,
-                            label=sku_name
-                        )
-                        
-                        if result:
-                            associated_images.append({
-                                "url": raw_github_url,
-                                "name": file_name,
-                                "sequence": img_info["sequence"],
-                                "is_main": is_main,
-                                "status": "associated",
-                                "vtex_response": result
-                            })
-                            total_images_associated += 1
-                            self.logger.debug(
-                                f"Successfully associated image {file_name} with SKU {sku_id}"
-                            )
-                            print(f"       ✅ Associated image {file_name} with SKU {sku_id}")
-                        else:
-                            associated_images.append({
-                                "url": raw_github_url,
-                                "name": file_name,
-                                "sequence": img_info["sequence"],
-                                "is_main": is_main,
-                                "status": "failed",
-                                "error": "Empty response from VTEX API"
-                            })
-                            failed_count += 1
-                            total_images_failed += 1
-                            print(f"       ❌ Failed to associate image {file_name}")
-                        
-                        time.sleep(0.3)  # Rate limiting
-                        
-                    except Exception as e:
-                        self.logger.error(
-                            f"Error associating image {file_name} with SKU {sku_id}: {e}",
-                            exc_info=True
-                        )
-                        associated_images.append({
-                            "url": raw_github_url,
-                            "name": file_name,
-                            "sequence": img_info["sequence"],
-                            "is_main": is_main,
-                            "status": "failed",
-                            "error": str(e)[:200]
-                        })
-                        failed_count += 1
-                        total_images_failed += 1
-                        print(f"       ❌ Error: {str(e)[:100]}")
-                
-                # Store results for this SKU
-                self.sku_image_associations[str(sku_id)] = {
-                    "sku_id": sku_id,
-                    "sku_name": sku_name,
-                    "images": associated_images,
-                    "total_uploaded": len([img for img in uploaded_images if img.get("status") == "uploaded"]),
-                    "total_associated": len([img for img in associated_images if img.get("status") == "associated"]),
-                    "total_failed": failed_count,
-                    "status": "completed" if len(associated_images) > 0 else "failed"
-                }
+        # Products are processed on their own worker threads; their VTEX associations share one
+        # pool and the token bucket, and GitHub writes are serialized inside image_manager.
+        # Progress output goes through a background writer so terminal I/O never stalls the workers.
+        with buffered_stdout(), \
+                ThreadPoolExecutor(max_workers=MAX_CONCURRENT_ASSOCIATIONS) as executor, \
+                ThreadPoolExecutor(max_workers=MAX_CONCURRENT_PRODUCTS) as product_pool:
+            results = product_pool.map(
+                lambda product_data: self._process_product_images(
+                    executor, product_data, url_to_vtex_product, github_repo_path
+                ),
+                products
+            )
+            for n_skus, n_associated, n_failed in results:
+                total_skus_processed += n_skus
+                total_images_associated += n_associated
+                total_images_failed += n_failed
         
         # Save output
         output = self._format_output()
         output["summary"]["total_skus_processed"] = total_skus_processed
-        output["summary"]["total_images_associated"] = total_images_associated
-        output["summary"]["total_images_failed"] = total_images_failed
         
-        save_state("vtex_images", output)
+        self._save_snapshot(output)
         
         self.logger.info(
             f"SKU image enrichment complete. "
@@ -233,30 +163,365 @@ class VTEXImageAgent:
         
         return output
     
-    def _format_output(self) -> Dict[str, Any]:
-        """Format output JSON."""
-        total_skus = len(self.sku_image_associations)
-        total_images = sum(
-            len(assoc.get("images", []))
-            for assoc in self.sku_image_associations.values()
-        )
-        total_associated = sum(
-            assoc.get("total_associated", 0)
-            for assoc in self.sku_image_associations.values()
-        )
-        total_failed = sum(
-            assoc.get("total_failed", 0)
-            for assoc in self.sku_image_associations.values()
+    def _process_product_images(
+        self,
+        executor: ThreadPoolExecutor,
+        product_data: Dict[str, Any],
+        url_to_vtex_product: Dict[str, Any],
+        github_repo_path: str
+    ) -> Tuple[int, int, int]:
+        """
+        Upload and associate the images of one product's SKUs. Runs on a product worker thread.
+        
+        Within the product this is a two-stage pipeline: while one SKU's associations run on
+        the pool, the next SKU's images are uploaded to GitHub. Results are collected one SKU behind.
+        
+        Returns:
+            Tuple of (SKUs processed, images associated, images failed)
+        """
+        product_url = product_data.get("url", "")
+        
+        # Get images from legacy site; products without images need no VTEX lookup at all
+        images = product_data.get("images", [])
+        if not images:
+            self.logger.info(f"No images found for product URL: {product_url}")
+            return 0, 0, 0
+        
+        vtex_product = url_to_vtex_product.get(product_url)
+        
+        if not vtex_product:
+            self.logger.warning(f"Could not find VTEX product for URL: {product_url}")
+            return 0, 0, 0
+        
+        # Get SKUs for this product
+        skus = vtex_product.get("skus", [])
+        if not skus:
+            self.logger.warning(f"No SKUs found for product URL: {product_url}")
+            return 0, 0, 0
+        
+        skus_processed = 0
+        images_associated = 0
+        images_failed = 0
+        pending_sku = None
+        images_hash = _image_urls_hash(images)
+        
+        # Process each SKU
+        for sku_data in skus:
+            sku_id = sku_data.get("id")
+            if not sku_id:
+                self.logger.warning(f"SKU data missing ID: {sku_data}")
+                continue
+            
+            sku_name = sku_data.get("name", "Product Image")
+            saved = self.sku_image_associations.get(str(sku_id))
+            if saved and saved.get("status") == "completed" and saved.get("images_hash") == images_hash:
+                self.logger.info(f"Skipping SKU {sku_id}: images already associated")
+                continue
+            
+            print(f"\n   🖼️  Processing images for SKU ID {sku_id} ({sku_name})...")
+            self.logger.info(f"Processing {len(images)} images for SKU {sku_id}")
+            
+            skus_processed += 1
+            
+            # Download, rename, and upload images to GitHub (once per product)
+            uploaded_images = self._upload_images(images, sku_id, github_repo_path)
+            
+            # Queue associations with VTEX, then collect the previous SKU's results
+            submitted = self._submit_associations(executor, sku_id, sku_name, uploaded_images)
+            if pending_sku is not None:
+                n_associated, n_failed = self._finish_sku(*pending_sku)
+                images_associated += n_associated
+                images_failed += n_failed
+            pending_sku = (sku_id, sku_name, uploaded_images, submitted, images_hash)
+        
+        if pending_sku is not None:
+            n_associated, n_failed = self._finish_sku(*pending_sku)
+            images_associated += n_associated
+            images_failed += n_failed
+        
+        return skus_processed, images_associated, images_failed
+    
+    def _upload_images(
+        self,
+        image_urls: List[str],
+        sku_id: int,
+        repo_path: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Download and upload a SKU's images to GitHub, reusing an earlier upload of the same
+        image list (SKUs of one product share it). Reused entries keep the uploaded URL and
+        are renamed [SkuId]_[SequenceNumber] for this SKU. Uploads with failures are not
+        reused, so the next SKU retries them.
+        
+        Returns:
+            List of uploaded image dicts, as returned by process_and_upload_images_to_github
+        """
+        key = (repo_path, tuple(image_urls))
+        cached = self._uploads_by_urls.get(key)
+        if cached is not None:
+            print(f"     ♻️  Reusing {len(cached)} image(s) already uploaded to GitHub")
+            return [
+                dict(img, name=f"{sku_id}_{img['sequence']}{os.path.splitext(img['name'])[1]}")
+                for img in cached
+            ]
+        
+        uploaded_images = process_and_upload_images_to_github(
+            image_urls=image_urls,
+            sku_id=sku_id,
+            repo_path=repo_path
         )
+        if uploaded_images and all(img.get("url") for img in uploaded_images):
+            self._uploads_by_urls[key] = uploaded_images
+        return uploaded_images
+    
+    def _submit_associations(
+        self,
+        executor: ThreadPoolExecutor,
+        sku_id: int,
+        sku_name: str,
+        uploaded_images: List[Dict[str, Any]]
+    ) -> List[Future]:
+        """
+        Queue VTEX association calls for a SKU's uploaded images on the pool.
+        Images that failed to upload are skipped (counted as failed when collected).
+        
+        Returns:
+            Futures of _associate_image result records, in image order
+        """
+        futures = []
+        for idx, img_info in enumerate(uploaded_images, start=1):
+            if not img_info.get("url"):
+                continue
+            is_main = (idx == 1)  # First image is main
+            futures.append(executor.submit(self._associate_image, sku_id, sku_name, img_info, is_main))
+        if futures:
+            print(f"     🔗 Associating {len(futures)} image(s) with VTEX SKU {sku_id}...")
+        return futures
+    
+    def _collect_associations(
+        self,
+        sku_id: int,
+        futures: List[Future]
+    ) -> Tuple[List[Dict[str, Any]], int, int]:
+        """
+        Wait for a SKU's queued associations, in image order.
+        
+        Returns:
+            Tuple of (result records, images associated, images failed to associate)
+        """
+        associated_images = []
+        n_associated = 0
+        n_failed = 0
+        for future in futures:
+            record = future.result()
+            associated_images.append(record)
+            file_name = record["name"]
+            if record["status"] == "associated":
+                n_associated += 1
+                print(f"       ✅ Associated image {file_name} with SKU {sku_id}")
+            else:
+                n_failed += 1
+                print(f"       ❌ Failed to associate image {file_name}: {record['error'][:100]}")
+        return associated_images, n_associated, n_failed
+    
+    def _associate_uploaded_images(
+        self,
+        sku_id: int,
+        sku_name: str,
+        uploaded_images: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], int, int]:
+        """
+        Associate a SKU's uploaded images with VTEX concurrently and wait for the results.
+        
+        Returns:
+            Tuple of (result records, images associated, images failed to associate)
+        """
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_ASSOCIATIONS) as executor:
+            futures = self._submit_associations(executor, sku_id, sku_name, uploaded_images)
+            return self._collect_associations(sku_id, futures)
+    
+    def _finish_sku(
+        self,
+        sku_id: int,
+        sku_name: str,
+        uploaded_images: List[Dict[str, Any]],
+        futures: List[Future],
+        images_hash: str
+    ) -> Tuple[int, int]:
+        """
+        Collect a SKU's queued associations (enrich_skus_with_images pipeline) and store its result.
+        
+        Returns:
+            Tuple of (images associated, images failed) for this SKU
+        """
+        associated_images, n_associated, n_failed = self._collect_associations(sku_id, futures)
+        associated_images, n_upload_failed = self._add_upload_failures(associated_images, uploaded_images)
+        failed_count = n_failed + n_upload_failed
+        self._store_sku_result(sku_id, self._sku_result(
+            sku_id, sku_name, uploaded_images, associated_images, n_associated, failed_count, images_hash
+        ))
+        return n_associated, failed_count
+    
+    @staticmethod
+    def _add_upload_failures(
+        associated_images: List[Dict[str, Any]],
+        uploaded_images: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Add a failure record for each image whose upload to GitHub failed, so a SKU's
+        "images" list covers every source image, in sequence order.
         
+        Returns:
+            Tuple of (result records including upload failures, number of upload failures)
+        """
+        upload_failures = []
+        for idx, img_info in enumerate(uploaded_images, start=1):
+            if img_info.get("url"):
+                continue
+            upload_failures.append({
+                "url": None,
+                "name": img_info.get("name", "unknown"),
+                "sequence": img_info.get("sequence", idx),
+                "is_main": (idx == 1),
+                "status": "failed",
+                "error": img_info.get("error", "Failed to upload image to GitHub"),
+                "original_url": img_info.get("original_url", "unknown")
+            })
+            print(f"       ❌ Skipping image {img_info.get('name', 'unknown')}: {img_info.get('error', 'Upload to GitHub failed')}")
+        if not upload_failures:
+            return associated_images, 0
+        records = sorted(associated_images + upload_failures, key=lambda img: img["sequence"])
+        return records, len(upload_failures)
+    
+    @staticmethod
+    def _sku_result(
+        sku_id: int,
+        sku_name: str,
+        uploaded_images: List[Dict[str, Any]],
+        associated_images: List[Dict[str, Any]],
+        n_associated: int,
+        failed_count: int,
+        images_hash: str
+    ) -> Dict[str, Any]:
+        """Build the stored association result for a SKU."""
+        return {
+            "sku_id": sku_id,
+            "sku_name": sku_name,
+            "images": associated_images,
+            "total_uploaded": sum(1 for img in uploaded_images if img.get("status") == "uploaded"),
+            "total_associated": n_associated,
+            "total_failed": failed_count,
+            "status": "completed" if len(associated_images) > 0 else "failed",
+            "images_hash": images_hash
+        }
+    
+    def _associate_image(
+        self,
+        sku_id: int,
+        sku_name: str,
+        img_info: Dict[str, Any],
+        is_main: bool
+    ) -> Dict[str, Any]:
+        """
+        Associate one uploaded image with a SKU in VTEX. Safe to call from worker threads.
+        
+        Returns:
+            Result record for the image ("status" is "associated" or "failed")
+        """
+        raw_github_url = img_info["url"]
+        file_name = img_info["name"]
+        record = {
+            "url": raw_github_url,
+            "name": file_name,
+            "sequence": img_info["sequence"],
+            "is_main": is_main,
+        }
+        try:
+            self._rate.acquire()
+            result = self.vtex_client.associate_sku_image(
+                sku_id=sku_id,
+                image_url=raw_github_url,
+                file_name=file_name,
+                is_main=is_main,
+                label=sku_name
+            )
+        except Exception as e:
+            self.logger.error(
+                f"Error associating image {file_name} with SKU {sku_id}: {e}",
+                exc_info=True
+            )
+            record["status"] = "failed"
+            record["error"] = str(e)[:200]
+            return record
+        
+        if result:
+            record["status"] = "associated"
+            record["vtex_response"] = result
+            self.logger.debug(f"Successfully associated image {file_name} with SKU {sku_id}")
+        else:
+            record["status"] = "failed"
+            record["error"] = "Empty response from VTEX API"
+        return record
+    
+    def _store_sku_result(self, sku_id: Any, result: Dict[str, Any]) -> None:
+        """Store a SKU's association result, keeping the summary totals in step."""
+        key = str(sku_id)
+        with self._results_lock:
+            previous = self.sku_image_associations.get(key)
+            if previous is not None:
+                self._add_to_totals(previous, -1)
+            self.sku_image_associations[key] = result
+            self._add_to_totals(result, 1)
+            # Persist each finished SKU right away so a crash mid-run keeps its progress
+            append_checkpoint("vtex_images", {"sku_id": key, "result": result})
+    
+    def _add_to_totals(self, assoc: Dict[str, Any], sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) one SKU result from the summary totals."""
+        self._totals["images"] += sign * len(assoc.get("images", []))
+        self._totals["associated"] += sign * assoc.get("total_associated", 0)
+        self._totals["failed"] += sign * assoc.get("total_failed", 0)
+    
+    def _recount_totals(self) -> None:
+        """Rebuild the summary totals from sku_image_associations (e.g. after loading state)."""
+        self._totals = {"images": 0, "associated": 0, "failed": 0}
+        for assoc in self.sku_image_associations.values():
+            self._add_to_totals(assoc, 1)
+    
+    def _replay_checkpoints(self, associations: Dict[str, Any]) -> int:
+        """
+        Merge SKU results from the checkpoint log into associations (later entries win).
+        
+        Returns:
+            Number of checkpointed SKU results applied
+        """
+        replayed = 0
+        for record in load_checkpoints("vtex_images"):
+            if not isinstance(record, dict) or "sku_id" not in record or not isinstance(record.get("result"), dict):
+                continue
+            associations[str(record["sku_id"])] = record["result"]
+            replayed += 1
+        if replayed:
+            self.logger.info(f"Replayed {replayed} checkpointed SKU image result(s) from a previous run")
+        return replayed
+    
+    def _save_snapshot(self, output: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Write the image results to state and truncate the checkpoint log they now cover."""
+        if output is None:
+            output = self._format_output()
+        save_state("vtex_images", output)
+        clear_checkpoints("vtex_images")
+        return output
+    
+    def _format_output(self) -> Dict[str, Any]:
+        """Format output JSON."""
         return {
             "sku_image_associations": self.sku_image_associations,
             "summary": {
-                "total_skus": total_skus,
-                "total_images": total_images,
-                "total_images_associated": total_associated,
-                "total_images_uploaded": total_associated,  # Backward compatibility
-                "total_images_failed": total_failed
+                "total_skus": len(self.sku_image_associations),
+                "total_images": self._totals["images"],
+                "total_images_associated": self._totals["associated"],
+                "total_images_uploaded": self._totals["associated"],  # Backward compatibility
+                "total_images_failed": self._totals["failed"]
             }
         }
     
@@ -294,108 +559,24 @@ class VTEXImageAgent:
         print(f"     🖼️  Processing {len(image_urls)} images for SKU {sku_id}...")
         self.logger.info(f"Processing {len(image_urls)} images for SKU {sku_id}")
         
-        # Download, rename, and upload images to GitHub
-        uploaded_images = process_and_upload_images_to_github(
-            image_urls=image_urls,
-            sku_id=sku_id,
-            repo_path=github_repo_path
-        )
+        # Download, rename, and upload images to GitHub (reused across SKUs with the same images)
+        uploaded_images = self._upload_images(image_urls, sku_id, github_repo_path)
         
         # Associate images with SKU in VTEX
-        associated_images = []
-        failed_count = 0
+        associated_images, n_associated, failed_count = self._associate_uploaded_images(
+            sku_id, sku_name, uploaded_images
+        )
         
-        for idx, img_info in enumerate(uploaded_images, start=1):
-            if not img_info.get("url"):
-                # Image upload to GitHub failed - record the failure
-                failed_count += 1
-                associated_images.append({
-                    "url": None,
-                    "name": img_info.get("name", "unknown"),
-                    "sequence": img_info.get("sequence", idx),
-                    "is_main": (idx == 1),
-                    "status": "failed",
-                    "error": img_info.get("error", "Failed to upload image to GitHub"),
-                    "original_url": img_info.get("original_url", "unknown")
-                })
-                print(f"       ❌ Skipping image {img_info.get('name', 'unknown')}: {img_info.get('error', 'Upload to GitHub failed')}")
-                continue
-            
-            raw_github_url = img_info["url"]
-            file_name = img_info["name"]
-            is_main = (idx == 1)  # First image is main
-            
-            try:
-                print(f"       [{idx}/{len(uploaded_images)}] Step 3: Associating image with VTEX SKU...")
-                print(f"          SKU ID: {sku_id}")
-                print(f"          Image URL: {raw_github_url[:80]}...")
-                print(f"          File name: {file_name}")
-                print(f"          Is main: {is_main}")
-                
-                result = self.vtex_client.associate_sku_image(
-                    sku_id=sku_id,
-                    image_url=raw_github_url,
-                    file_name=file_name,
-                    is_main=is_main,
-                    label=sku_name
-                )
-                
-                if result:
-                    associated_images.append({
-                        "url": raw_github_url,
-                        "name": file_name,
-                        "sequence": img_info["sequence"],
-                        "is_main": is_main,
-                        "status": "associated",
-                        "vtex_response": result
-                    })
-                    self.logger.debug(
-                        f"Successfully associated image {file_name} with SKU {sku_id}"
-                    )
-                    print(f"       ✅ Association successful!")
-                    print(f"          Response: {str(result)[:100]}...")
-                else:
-                    associated_images.append({
-                        "url": raw_github_url,
-                        "name": file_name,
-                        "sequence": img_info["sequence"],
-                        "is_main": is_main,
-                        "status": "failed",
-                        "error": "Empty response from VTEX API"
-                    })
-                    failed_count += 1
-                    print(f"       ❌ Association failed: Empty response from VTEX API")
-                
-                time.sleep(0.3)  # Rate limiting
-                
-            except Exception as e:
-                self.logger.error(
-                    f"Error associating image {file_name} with SKU {sku_id}: {e}",
-                    exc_info=True
-                )
-                associated_images.append({
-                    "url": raw_github_url,
-                    "name": file_name,
-                    "sequence": img_info["sequence"],
-                    "is_main": is_main,
-                    "status": "failed",
-                    "error": str(e)[:200]
-                })
-                failed_count += 1
-                print(f"         ❌ Error: {str(e)[:100]}")
+        associated_images, n_upload_failed = self._add_upload_failures(associated_images, uploaded_images)
+        failed_count += n_upload_failed
         
         # Store results for this SKU
-        result = {
-            "sku_id": sku_id,
-            "sku_name": sku_name,
-            "images": associated_images,
-            "total_uploaded": len([img for img in uploaded_images if img.get("status") == "uploaded"]),
-            "total_associated": len([img for img in associated_images if img.get("status") == "associated"]),
-            "total_failed": failed_count,
-            "status": "completed" if len(associated_images) > 0 else "failed"
-        }
+        result = self._sku_result(
+            sku_id, sku_name, uploaded_images, associated_images, n_associated, failed_count,
+            _image_urls_hash(image_urls)
+        )
         
-        self.sku_image_associations[str(sku_id)] = result
+        self._store_sku_result(sku_id, result)
         
         return result
     
@@ -1,16 +1,44 @@
 """VTEX Product/SKU Agent - Creates products and SKUs in VTEX."""
-from typing import Dict, Any, List, Optional, TYPE_CHECKING
+from typing import Dict, Any, Callable, List, Optional, Tuple, TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import re
-import time
+import threading
 
 from ..clients.vtex_client import VTEXClient
-from ..utils.state_manager import save_state, load_state, load_custom_prompt
+from ..utils.state_manager import (
+    save_state,
+    load_state,
+    load_custom_prompt,
+    append_checkpoint,
+    load_checkpoints,
+    clear_checkpoints,
+)
 from ..utils.logger import get_agent_logger
+from ..utils.console import buffered_stdout
+from ..utils.rate_limiter import TokenBucket
 from ..utils.validation import extract_product_id, extract_sku_id, normalize_spec_name
+from .vtex_category_tree_agent import SKIP_CATEGORY_NAMES
 
 if TYPE_CHECKING:
     from .vtex_category_tree_agent import VTEXCategoryTreeAgent
 
+# Products whose VTEX calls run in parallel in create_products_and_skus
+MAX_CONCURRENT_PRODUCTS = 8
+
+# Custom prompt line holding field type overrides (matched case-insensitively), and its
+# "Material=Combo" or "Material: Combo" pairs
+FIELD_TYPE_OVERRIDES_MARKER = "field type overrides:"
+FIELD_TYPE_OVERRIDE_RE = re.compile(r'(\w+)\s*[=:]\s*(\w+)', re.IGNORECASE)
+
+
+def default_skus(product_id: int) -> List[Dict[str, Any]]:
+    """Build the single default SKU used when a product has none extracted."""
+    return [{
+        "Name": "Default",
+        "EAN": f"EAN{product_id}",
+        "IsActive": True
+    }]
+
 
 class VTEXProductSKUAgent:
     """Agent responsible for creating products and SKUs in VTEX."""
@@ -25,14 +53,23 @@ class VTEXProductSKUAgent:
         self.vtex_client = vtex_client or VTEXClient()
         self.category_tree_agent = category_tree_agent
         
-        # Track created products
+        # Track created products (SKU lists are appended from worker threads under the lock)
         self.products = {}
+        self._products_lock = threading.Lock()
         
         # Load field type overrides from custom prompt or use provided overrides
         self.field_type_overrides = field_type_overrides or self._load_field_type_overrides()
         
         # Track dynamically created specification fields (not used - specifications disabled)
         self.created_spec_fields = {}
+        
+        # Case-folded department/brand/category indexes over the category tree (see _tree_lookups)
+        self._lookups = None
+        self._lookups_key = None
+        self._lookups_source = None
+        
+        # Paces VTEX write calls (shared by worker threads); calls under the limit go out immediately
+        self._rate = TokenBucket(rate=5, capacity=10)
     
     def _load_field_type_overrides(self) -> Dict[str, str]:
         """
@@ -51,32 +88,214 @@ class VTEXProductSKUAgent:
             state = load_state("field_type_overrides")
             if state and isinstance(state, dict):
                 overrides.update(state)
-                self.logger.info(f"Loaded {len(overrides)} field type overrides from state")
+                self.logger.info("Loaded %d field type overrides from state", len(overrides))
         except Exception as e:
-            self.logger.debug(f"Could not load field type overrides from state: {e}")
+            self.logger.debug("Could not load field type overrides from state: %s", e)
         
         # Also check custom prompt for field type instructions
         # Format: "Field Type Overrides: Material=Combo, Peso=Number, Acabamento=Combo"
         try:
             custom_prompt = load_custom_prompt()
-            if custom_prompt and "field type" in custom_prompt.lower():
-                # Simple parsing: look for "Field Type Overrides:" or similar
-                import re
-                # Match patterns like "Material=Combo" or "Material: Combo"
-                matches = re.findall(r'(\w+)\s*[=:]\s*(\w+)', custom_prompt, re.IGNORECASE)
+            marker_at = custom_prompt.lower().find(FIELD_TYPE_OVERRIDES_MARKER) if custom_prompt else -1
+            if marker_at != -1:
+                # Only the rest of the marker line holds overrides; key=value text elsewhere
+                # in the prompt (URLs, config lines) is not scanned
+                overrides_line = custom_prompt[marker_at + len(FIELD_TYPE_OVERRIDES_MARKER):].split("\n", 1)[0]
+                matches = FIELD_TYPE_OVERRIDE_RE.findall(overrides_line)
                 for spec_name, field_type in matches:
                     overrides[spec_name] = field_type.capitalize()  # Normalize to Title case
                 
                 if matches:
-                    self.logger.info(f"Loaded {len(matches)} field type overrides from custom prompt")
+                    self.logger.info("Loaded %d field type overrides from custom prompt", len(matches))
         except Exception as e:
-            self.logger.debug(f"Could not parse field type overrides from custom prompt: {e}")
+            self.logger.debug("Could not parse field type overrides from custom prompt: %s", e)
         
         if overrides:
-            self.logger.info(f"Total field type overrides loaded: {overrides}")
+            self.logger.info("Total field type overrides loaded: %s", overrides)
         
         return overrides
     
+    def _tree_lookups(
+        self,
+        departments: Dict[str, Any],
+        categories: Dict[str, Any],
+        brands: Dict[str, Any]
+    ) -> Dict[str, Dict[Any, Any]]:
+        """
+        Case-folded indexes used to resolve category and brand IDs with dict probes:
+        "departments" (lowercased key/name -> department key), "brands" (lowercased
+        key/name -> brand ID) and "categories" (parent_id -> lowercased name -> category).
+        Where several entries share a name the first one wins, as in a linear scan.
+        "category_ids" holds every department/category ID, to validate explicit IDs, and
+        "category_paths" memoizes resolved category IDs (see _resolve_category_id).
+        
+        The tree dicts only grow, so the indexes are rebuilt only when a different tree
+        is passed in or entries were added since the last call.
+        """
+        key = (
+            id(departments), len(departments),
+            id(categories), len(categories),
+            id(brands), len(brands)
+        )
+        if self._lookups_key != key:
+            dept_by_lc = {}
+            for dept_key, dept_data in departments.items():
+                dept_by_lc.setdefault(dept_key.lower(), dept_key)
+                dept_by_lc.setdefault(dept_data.get("name", "").lower(), dept_key)
+            
+            brand_by_lc = {}
+            for brand_key, brand_data in brands.items():
+                brand_id = brand_data.get("id")
+                brand_by_lc.setdefault(str(brand_key).strip().lower(), brand_id)
+                brand_by_lc.setdefault(str(brand_data.get("name", "")).strip().lower(), brand_id)
+            
+            cats_by_parent = {}
+            for cat_data in categories.values():
+                children = cats_by_parent.setdefault(cat_data.get("parent_id"), {})
+                children.setdefault(cat_data.get("name", "").strip().lower(), cat_data)
+            
+            self._lookups = {
+                "departments": dept_by_lc,
+                "brands": brand_by_lc,
+                "categories": cats_by_parent,
+                "category_ids": {
+                    node.get("id") for node in (*departments.values(), *categories.values())
+                },
+                "category_paths": {}
+            }
+            self._lookups_key = key
+            # Keep the indexed dicts alive so their ids cannot be reused by another tree
+            self._lookups_source = (departments, categories, brands)
+        return self._lookups
+    
+    def _resolve_category_id(
+        self,
+        product: Dict[str, Any],
+        departments: Dict[str, Any],
+        lookups: Dict[str, Dict[Any, Any]]
+    ) -> Optional[int]:
+        """
+        Get the category ID for a product. An explicit CategoryId carried by the payload
+        is used as-is when it exists in the tree; otherwise the ID is derived from the
+        category path. Path results are memoized per distinct path (products sharing a
+        breadcrumb reuse it); the memo lives in the tree lookups, so it is reset whenever
+        the tree changes.
+        
+        Args:
+            product: Product data with "categories" (or a single "category")
+            departments: Departments of the category tree
+            lookups: Indexes from _tree_lookups for the same tree
+            
+        Returns:
+            Category ID, or None if the path does not resolve
+        """
+        product_info = product.get("product") or {}
+        explicit_id = (
+            product.get("CategoryId") or product.get("categoryId")
+            or product_info.get("CategoryId") or product_info.get("categoryId")
+        )
+        if explicit_id:
+            try:
+                explicit_id = int(explicit_id)
+            except (TypeError, ValueError):
+                explicit_id = None
+            if explicit_id in lookups["category_ids"]:
+                return explicit_id
+        
+        categories_list = product.get("categories", [])
+        if not categories_list:
+            category = product.get("category", {})
+            if category:
+                categories_list = [category]
+        
+        # Normalize the path once: (stripped name, lowercased name) per level
+        path = [(name, name.lower()) for name in (c.get("Name", "").strip() for c in categories_list)]
+        path_key = tuple(name for name, _name_lower in path)
+        
+        path_ids = lookups["category_paths"]
+        if path_key not in path_ids:
+            path_ids[path_key] = self._resolve_category_path(path, departments, lookups)
+        return path_ids[path_key]
+    
+    @staticmethod
+    def _resolve_category_path(
+        path: List[Tuple[str, str]],
+        departments: Dict[str, Any],
+        lookups: Dict[str, Dict[Any, Any]]
+    ) -> Optional[int]:
+        """Resolve a normalized category path against the tree (see _resolve_category_id)."""
+        if not path:
+            return None
+        
+        # Skip only obvious root-level categories that aren't real departments
+        # NOTE: We intentionally do NOT skip "Início"/"Inicio" here because many
+        # sites use it as the actual department in VTEX.
+        skip_names = SKIP_CATEGORY_NAMES
+        dept_by_lc = lookups["departments"]
+        cats_by_parent = lookups["categories"]
+        
+        # Find the department (usually level 2, but could be level 1)
+        dept_name = None
+        dept_index = 0
+        
+        for i, (_cat_name, cat_name_lower) in enumerate(path):
+            # Skip root categories
+            if cat_name_lower in skip_names:
+                continue
+            
+            # Try to find this as a department (case-insensitive)
+            dept_name = dept_by_lc.get(cat_name_lower)
+            if dept_name:
+                dept_index = i
+                break
+        
+        if not dept_name or dept_name not in departments:
+            # Fallback: product categories may not start with department name (e.g. "Linhas"
+            # under department "Início"). Try each department as root and match full path.
+            for _dept_key, dept_data in departments.items():
+                parent_id = dept_data["id"]
+                matched_any = False
+                matched_all = True
+                for cat_name, cat_name_lower in path:
+                    if not cat_name or cat_name_lower in skip_names:
+                        continue
+                    cat_data = cats_by_parent.get(parent_id, {}).get(cat_name_lower)
+                    if cat_data is None:
+                        matched_all = False
+                        break
+                    parent_id = cat_data.get("id")
+                    matched_any = True
+                if matched_all and matched_any:
+                    return parent_id
+            return None
+
+        parent_id = departments[dept_name]["id"]
+
+        # If only department level, return it
+        if len(path) <= dept_index + 1:
+            return parent_id
+
+        # Traverse remaining categories
+        for cat_name, cat_name_lower in path[dept_index + 1:]:
+            if not cat_name or cat_name_lower in skip_names:
+                continue
+
+            # Try to find category with matching parent (case-insensitive)
+            cat_data = cats_by_parent.get(parent_id, {}).get(cat_name_lower)
+            if cat_data is None:
+                # If exact match not found, continue with current parent_id
+                break
+            parent_id = cat_data.get("id")
+
+        return parent_id
+    
+    @staticmethod
+    def _resolve_brand_id(brand_name: str, lookups: Dict[str, Dict[Any, Any]]) -> Optional[int]:
+        """Get brand ID by name (case-insensitive), matching both brand keys and stored names."""
+        if not brand_name:
+            return None
+        return lookups["brands"].get(brand_name.strip().lower())
+    
     def create_products_and_skus(
         self,
         legacy_site_data: Dict[str, Any],
@@ -96,14 +315,21 @@ class VTEXProductSKUAgent:
         """
         self.logger.info("Starting product and SKU creation")
         
-        # Try to load from state
-        state = load_state("vtex_products_skus")
-        if state and state.get("products"):
+        # Try to load from state. Products checkpointed after the last snapshot (an interrupted
+        # run) are merged in, and only the products not created yet are processed.
+        state = load_state("vtex_products_skus") or {}
+        saved_products = dict(state.get("products", {}))
+        replayed = self._replay_checkpoints(saved_products)
+        if saved_products and not replayed:
             self.logger.info("Loaded products from state")
-            self.products = state.get("products", {})
+            self.products = saved_products
             return self._format_output()
         
         products = legacy_site_data.get("products", [])
+        if replayed:
+            self.products = saved_products
+            products = [p for p in products if p.get("url") not in saved_products]
+            print(f"   🔄 Resuming: {len(saved_products)} product(s) already created, {len(products)} remaining")
         categories = vtex_category_tree.get("categories", {})
         departments = vtex_category_tree.get("departments", {})
         brands = vtex_category_tree.get("brands", {})
@@ -116,301 +342,76 @@ class VTEXProductSKUAgent:
                 "Specification fields will be created automatically as needed during product creation."
             )
         
-        # Helper functions to get IDs from category tree
-        def get_category_id_for_product(product: Dict[str, Any]) -> Optional[int]:
-            """Get category ID for a product."""
-            categories_list = product.get("categories", [])
-            if not categories_list:
-                category = product.get("category", {})
-                if category:
-                    categories_list = [category]
-            if not categories_list:
-                return None
-            
-            # Skip only obvious root-level categories that aren't real departments
-            # NOTE: We intentionally do NOT skip "Início"/"Inicio" here because many
-            # sites use it as the actual department in VTEX.
-            skip_names = {"home", "root", "default"}
-            
-            # Find the department (usually level 2, but could be level 1)
-            dept_name = None
-            dept_index = 0
-            
-            for i, cat_info in enumerate(categories_list):
-                cat_name = cat_info.get("Name", "").strip()
-                cat_name_lower = cat_name.lower()
-                
-                # Skip root categories
-                if cat_name_lower in skip_names:
-                    continue
-                
-                # Try to find this as a department (case-insensitive)
-                for dept_key, dept_data in departments.items():
-                    if dept_key.lower() == cat_name_lower or dept_data.get("name", "").lower() == cat_name_lower:
-                        dept_name = dept_key
-                        dept_index = i
-                        break
-                
-                if dept_name:
-                    break
-            
-            if not dept_name:
-                # If no department found, try first non-skip category
-                for cat_info in categories_list:
-                    cat_name = cat_info.get("Name", "").strip()
-                    if cat_name.lower() not in skip_names:
-                        # Try case-insensitive match
-                        for dept_key, dept_data in departments.items():
-                            if dept_key.lower() == cat_name.lower() or dept_data.get("name", "").lower() == cat_name.lower():
-                                dept_name = dept_key
-                                break
-                        if dept_name:
-                            break
-            
-            if not dept_name or dept_name not in departments:
-                # Fallback: product categories may not start with department name (e.g. "Linhas"
-                # under department "Início"). Try each department as root and match full path.
-                for _dept_key, dept_data in departments.items():
-                    parent_id = dept_data["id"]
-                    matched_any = False
-                    matched_all = True
-                    for cat_info in categories_list:
-                        cat_name = cat_info.get("Name", "").strip()
-                        if not cat_name or cat_name.lower() in skip_names:
-                            continue
-                        found = False
-                        for _cat_key, cat_data in categories.items():
-                            if (
-                                cat_data.get("name", "").strip().lower() == cat_name.lower()
-                                and cat_data.get("parent_id") == parent_id
-                            ):
-                                parent_id = cat_data.get("id")
-                                found = True
-                                matched_any = True
-                                break
-                        if not found:
-                            matched_all = False
-                            break
-                    if matched_all and matched_any:
-                        return parent_id
-                return None
-
-            parent_id = departments[dept_name]["id"]
-
-            # If only department level, return it
-            if len(categories_list) <= dept_index + 1:
-                return parent_id
-
-            # Traverse remaining categories
-            for cat_info in categories_list[dept_index + 1:]:
-                cat_name = cat_info.get("Name", "").strip()
-                if not cat_name or cat_name.lower() in skip_names:
-                    continue
-
-                # Try to find category with matching parent (case-insensitive)
-                found = False
-                for cat_key, cat_data in categories.items():
-                    # Check if name matches (case-insensitive) and parent matches
-                    cat_data_name = cat_data.get("name", "").strip()
-                    cat_data_parent = cat_data.get("parent_id")
-
-                    if (
-                        cat_data_name.lower() == cat_name.lower()
-                        and cat_data_parent == parent_id
-                    ):
-                        parent_id = cat_data.get("id")
-                        found = True
-                        break
-
-                if not found:
-                    # If exact match not found, continue with current parent_id
-                    break
-
-            return parent_id
-        
-        def get_brand_id(brand_name: str) -> Optional[int]:
-            """Get brand ID by name (case-insensitive)."""
-            if not brand_name:
-                return None
-            
-            target = brand_name.strip().lower()
-            
-            # Try matching against both the brand dict keys and their stored names
-            for brand_key, brand_data in brands.items():
-                key_name = str(brand_key).strip().lower()
-                data_name = str(brand_data.get("name", "")).strip().lower()
-                
-                if target == key_name or target == data_name:
-                    return brand_data.get("id")
-            
-            return None
-        
-        def get_spec_field_id(category_id: int, spec_name: str) -> Optional[int]:
-            """Get specification field ID."""
-            normalized = normalize_spec_name(spec_name)
-            spec_key = f"{category_id}::{normalized}"
-            field_data = spec_fields.get(spec_key)
-            if field_data:
-                return field_data.get("id")
-            return None
+        lookups = self._tree_lookups(departments, categories, brands)
         
         print(f"\n📦 Processing {len(products)} products...")
         
-        for i, product_data in enumerate(products, 1):
-            print(f"\n   [{i}/{len(products)}] Processing product...")
-            self.logger.info(f"Processing product {i}/{len(products)}")
-            
-            try:
-                # Get category ID
-                category_id = get_category_id_for_product(product_data)
-                if not category_id:
-                    product_categories = product_data.get("categories", [])
-                    category_names = [c.get("Name", "") for c in product_categories]
-                    available_depts = list(departments.keys())
-                    self.logger.warning(
-                        f"Could not determine category ID for product. "
-                        f"Product categories: {category_names}. "
-                        f"Available departments: {available_depts}. Skipping product."
-                    )
-                    continue
-                
-                # Get brand ID
-                brand_name = product_data.get("brand", {}).get("Name", "Default")
-                brand_id = get_brand_id(brand_name)
-                if not brand_id:
-                    self.logger.warning(f"Could not determine brand ID for {brand_name}, skipping")
-                    continue
-                
-                # Create product
-                product_info = product_data.get("product", {})
-                product_name = product_info.get("Name", "Product")
-                print(f"     📦 Creating product: {product_name}")
-                
-                # Extract product ID
-                extracted_product_id = product_info.get("ProductId")
-                product_id_param = extract_product_id(extracted_product_id)
-                
-                product = self.vtex_client.create_product(
-                    name=product_name,
-                    category_id=category_id,
-                    brand_id=brand_id,
-                    description=product_info.get("Description"),
-                    short_description=product_info.get("ShortDescription"),
-                    is_active=True,  # Always set Display on website flag active
-                    is_visible=True,  # Always set product visible when creating
-                    show_without_stock=product_info.get("ShowWithoutStock", True),
-                    product_id=product_id_param
-                )
-                
-                product_id = product.get("Id") if isinstance(product, dict) else None
-                if not product_id:
-                    self.logger.warning(f"Could not get product ID, skipping")
-                    continue
-                
-                # Ensure IsActive is set to True (in case product already existed)
+        # Category/brand resolution is cheap and stays on this thread; the VTEX calls for
+        # each product (product, specifications, SKUs) run on the pool. Each product is
+        # checkpointed and reported as soon as it finishes; self.products is filled in input
+        # order once all are done.
+        # Progress lines from all workers go through one background writer, and per-SKU
+        # detail goes to the log rather than the console
+        with buffered_stdout(), ThreadPoolExecutor(max_workers=MAX_CONCURRENT_PRODUCTS) as executor:
+            futures = {}
+            for i, product_data in enumerate(products, 1):
                 try:
-                    if not product.get("IsActive", False) or not product.get("IsVisible", False):
-                        self.vtex_client.update_product(product_id, is_active=True, is_visible=True)
-                        if not product.get("IsActive", False):
-                            print(f"       ✓ Updated product IsActive flag to True")
-                        if not product.get("IsVisible", False):
-                            print(f"       ✓ Updated product IsVisible flag to True")
-                except Exception as update_error:
-                    self.logger.warning(f"Could not update product flags for product {product_id}: {update_error}")
-                
-                if extracted_product_id:
-                    print(f"       ℹ️  Extracted Product ID: {extracted_product_id}")
-                
-                # Set specifications
-                specifications = product_data.get("specifications", [])
-                if specifications:
-                    print(f"     📋 Processing {len(specifications)} specifications...")
-                    self._set_product_specifications(
-                        product_id,
-                        category_id,
-                        specifications,
-                        spec_fields,
-                        category_tree=vtex_category_tree
-                    )
-                
-                # Create SKUs
-                skus = product_data.get("skus", [])
-                if not skus:
-                    # Create default SKU
-                    skus = [{
-                        "Name": "Default",
-                        "EAN": f"EAN{product_id}",
-                        "IsActive": True
-                    }]
-                
-                created_skus = []
-                for sku_data in skus:
-                    sku_name = sku_data.get("Name", "Default")
-                    print(f"       🔢 Creating SKU: {sku_name}")
-                    
-                    extracted_sku_id = sku_data.get("SkuId")
-                    sku_id_param = extract_sku_id(extracted_sku_id)
-                    
-                    if extracted_sku_id:
-                        print(f"         ℹ️  Extracted SKU ID: {extracted_sku_id}")
+                    # Get category ID
+                    category_id = self._resolve_category_id(product_data, departments, lookups)
+                    if not category_id:
+                        product_categories = product_data.get("categories", [])
+                        category_names = [c.get("Name", "") for c in product_categories]
+                        available_depts = list(departments.keys())
+                        self.logger.warning(
+                            "Could not determine category ID for product. "
+                            "Product categories: %s. "
+                            "Available departments: %s. Skipping product.",
+                            category_names,
+                            available_depts
+                        )
+                        continue
                     
-                    sku = self.vtex_client.create_sku(
-                        product_id=product_id,
-                        name=sku_name,
-                        ean=sku_data.get("EAN", f"EAN{product_id}"),
-                        is_active=False,  # VTEX requires files/components before SKU can be active
-                        ref_id=sku_data.get("RefId") or extracted_sku_id,
-                        price=sku_data.get("Price") or 0,  # Ensure price is set (default to 0)
-                        list_price=sku_data.get("ListPrice") or sku_data.get("Price") or 0,
-                        package_height=1,  # Set packaged dimensions to 1
-                        package_width=1,
-                        package_length=1,
-                        package_weight=1,  # Set packaged weight to 1
-                        height=1,  # Set unpackaged dimensions to 1
-                        width=1,
-                        length=1,
-                        weight=1,  # Set unpackaged weight to 1
-                        sku_id=sku_id_param
-                    )
-                    
-                    sku_id = sku.get("Id") if isinstance(sku, dict) else None
-                    if sku_id:
-                        # Note: SKU activation is done after images in the flow that uses this (if any).
-                        # Note: Price and inventory are NOT set here
-                        # They should be set after images are added in the correct order:
-                        # Create SKU > Add images > Add price > Add inventory
-                        
-                        created_skus.append({
-                            "id": sku_id,
-                            "name": sku_name,
-                            "sku_id_preserved": extracted_sku_id,
-                            "ref_id": sku_data.get("RefId") or extracted_sku_id,
-                            "created": True
-                        })
-                
-                # Store product
-                product_url = product_data.get("url", f"product_{product_id}")
-                self.products[product_url] = {
-                    "id": product_id,
-                    "name": product_name,
-                    "category_id": category_id,
-                    "brand_id": brand_id,
-                    "product_id_preserved": extracted_product_id,
-                    "created": True,
-                    "skus": created_skus,
-                    "specifications_set": len(specifications)
-                }
-                
-                time.sleep(0.5)  # Rate limiting
+                    # Get brand ID
+                    brand_name = product_data.get("brand", {}).get("Name", "Default")
+                    brand_id = self._resolve_brand_id(brand_name, lookups)
+                    if not brand_id:
+                        self.logger.warning("Could not determine brand ID for %s, skipping", brand_name)
+                        continue
+                except Exception as e:
+                    self.logger.error("Error processing product: %s", e, exc_info=True)
+                    print(f"     ⚠️  Error processing product: {e}")
+                    continue
                 
-            except Exception as e:
-                self.logger.error(f"Error processing product: {e}", exc_info=True)
-                print(f"     ⚠️  Error processing product: {e}")
-                continue
+                future = executor.submit(
+                    self._create_product_with_skus,
+                    product_data,
+                    category_id,
+                    brand_id,
+                    spec_fields,
+                    vtex_category_tree
+                )
+                futures[future] = i
+            
+            created_by_index = {}
+            for future in as_completed(futures):
+                i = futures[future]
+                created = future.result()
+                self.logger.info("Finished product %d/%d", i, len(products))
+                if created:
+                    product_url, product_record = created
+                    created_by_index[i] = created
+                    # Persist each created product right away so a crash mid-run keeps its progress
+                    append_checkpoint("vtex_products_skus", {"url": product_url, "product": product_record})
+                    print(f"   [{i}/{len(products)}] ✅ Product {product_record['id']} done ({len(product_record['skus'])} SKU(s))")
+                else:
+                    print(f"   [{i}/{len(products)}] ⚠️  Product not created")
+        
+        for i in sorted(created_by_index):
+            product_url, product_record = created_by_index[i]
+            self.products[product_url] = product_record
         
         # Save output
-        output = self._format_output()
-        save_state("vtex_products_skus", output)
+        output = self._save_snapshot()
         
         # Also update specification fields state with dynamically created fields
         if self.created_spec_fields:
@@ -419,12 +420,216 @@ class VTEXProductSKUAgent:
             existing_fields.update(self.created_spec_fields)
             spec_state["specification_fields"] = existing_fields
             save_state("vtex_specifications", spec_state)
-            self.logger.info(f"Updated specification fields state with {len(self.created_spec_fields)} dynamically created fields")
+            self.logger.info("Updated specification fields state with %d dynamically created fields", len(self.created_spec_fields))
         
-        self.logger.info(f"Product/SKU creation complete. Created {len(self.products)} products")
+        self.logger.info("Product/SKU creation complete. Created %d products", len(self.products))
         
         return output
     
+    def _create_product_with_skus(
+        self,
+        product_data: Dict[str, Any],
+        category_id: int,
+        brand_id: int,
+        spec_fields: Dict[str, Dict[str, Any]],
+        vtex_category_tree: Dict[str, Any]
+    ) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Create one product with its specifications and SKUs in VTEX. Runs on a worker thread.
+        
+        Returns:
+            Tuple of (product URL, product record), or None if the product was skipped or failed
+        """
+        try:
+            # Create product
+            product_info = product_data.get("product", {})
+            product_name = product_info.get("Name", "Product")
+            print(f"     📦 Creating product: {product_name}")
+            
+            # Extract product ID
+            extracted_product_id = product_info.get("ProductId")
+            product_id_param = extract_product_id(extracted_product_id)
+            
+            self._rate.acquire()
+            product = self.vtex_client.create_product(
+                name=product_name,
+                category_id=category_id,
+                brand_id=brand_id,
+                description=product_info.get("Description"),
+                short_description=product_info.get("ShortDescription"),
+                is_active=True,  # Always set Display on website flag active
+                is_visible=True,  # Always set product visible when creating
+                show_without_stock=product_info.get("ShowWithoutStock", True),
+                product_id=product_id_param
+            )
+            
+            product_id = product.get("Id") if isinstance(product, dict) else None
+            if not product_id:
+                self.logger.warning("Could not get product ID, skipping")
+                return None
+            
+            # Ensure IsActive is set to True (in case product already existed)
+            try:
+                if not product.get("IsActive", False) or not product.get("IsVisible", False):
+                    self._rate.acquire()
+                    self.vtex_client.update_product(product_id, is_active=True, is_visible=True)
+                    if not product.get("IsActive", False):
+                        print(f"       ✓ Updated product IsActive flag to True")
+                    if not product.get("IsVisible", False):
+                        print(f"       ✓ Updated product IsVisible flag to True")
+            except Exception as update_error:
+                self.logger.warning("Could not update product flags for product %s: %s", product_id, update_error)
+            
+            if extracted_product_id:
+                print(f"       ℹ️  Extracted Product ID: {extracted_product_id}")
+            
+            # Set specifications
+            specifications = product_data.get("specifications", [])
+            if specifications:
+                print(f"     📋 Processing {len(specifications)} specifications...")
+                self._set_product_specifications(
+                    product_id,
+                    category_id,
+                    specifications,
+                    spec_fields,
+                    category_tree=vtex_category_tree
+                )
+            
+            # Create SKUs
+            skus = product_data.get("skus") or default_skus(product_id)
+            
+            created_skus = []
+            for sku_data in skus:
+                sku_name = sku_data.get("Name", "Default")
+                self.logger.info("Creating SKU %s for product %s", sku_name, product_id)
+            
+                extracted_sku_id = sku_data.get("SkuId")
+                sku_id_param = extract_sku_id(extracted_sku_id)
+            
+                if extracted_sku_id:
+                    self.logger.info("Extracted SKU ID: %s", extracted_sku_id)
+            
+                self._rate.acquire()
+                sku = self.vtex_client.create_sku(
+                    product_id=product_id,
+                    name=sku_name,
+                    ean=sku_data.get("EAN", f"EAN{product_id}"),
+                    is_active=False,  # VTEX requires files/components before SKU can be active
+                    ref_id=sku_data.get("RefId") or extracted_sku_id,
+                    price=sku_data.get("Price") or 0,  # Ensure price is set (default to 0)
+                    list_price=sku_data.get("ListPrice") or sku_data.get("Price") or 0,
+                    package_height=1,  # Set packaged dimensions to 1
+                    package_width=1,
+                    package_length=1,
+                    package_weight=1,  # Set packaged weight to 1
+                    height=1,  # Set unpackaged dimensions to 1
+                    width=1,
+                    length=1,
+                    weight=1,  # Set unpackaged weight to 1
+                    sku_id=sku_id_param
+                )
+            
+                sku_id = sku.get("Id") if isinstance(sku, dict) else None
+                if sku_id:
+                    # Note: SKU activation is done after images in the flow that uses this (if any).
+                    # Note: Price and inventory are NOT set here
+                    # They should be set after images are added in the correct order:
+                    # Create SKU > Add images > Add price > Add inventory
+            
+                    created_skus.append({
+                        "id": sku_id,
+                        "name": sku_name,
+                        "sku_id_preserved": extracted_sku_id,
+                        "ref_id": sku_data.get("RefId") or extracted_sku_id,
+                        "created": True
+                    })
+            
+            # Store product
+            product_url = product_data.get("url", f"product_{product_id}")
+            return product_url, {
+                "id": product_id,
+                "name": product_name,
+                "category_id": category_id,
+                "brand_id": brand_id,
+                "product_id_preserved": extracted_product_id,
+                "created": True,
+                "skus": created_skus,
+                "specifications_set": len(specifications)
+            }
+        except Exception as e:
+            self._back_off_if_rate_limited(e)
+            self.logger.error("Error processing product: %s", e, exc_info=True)
+            print(f"     ⚠️  Error processing product: {e}")
+            return None
+    
+    def _back_off_if_rate_limited(self, error: Exception) -> None:
+        """
+        Pause all workers when VTEX still answers 429 after the session's own retries,
+        honouring Retry-After (seconds) when present.
+        """
+        response = getattr(error, "response", None)
+        if response is None or response.status_code != 429:
+            return
+        try:
+            retry_after = float(response.headers.get("Retry-After", 1))
+        except (TypeError, ValueError):
+            retry_after = 1.0
+        self.logger.warning("VTEX rate limit hit; pausing requests for %.1fs", retry_after)
+        self._rate.penalize(retry_after)
+    
+    def _create_or_get(
+        self,
+        create_fn: Callable[[], Dict[str, Any]],
+        get_fn: Callable[[int], Optional[Dict[str, Any]]],
+        entity_id: Optional[int],
+        entity_name: str,
+        fallback: Dict[str, Any]
+    ) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Create an entity, falling back to the existing one when VTEX answers 409 Conflict.
+        
+        Args:
+            create_fn: Issues the create call
+            get_fn: Fetches an existing entity by ID
+            entity_id: ID requested for the new entity (needed to look up a conflicting one)
+            entity_name: "product" or "SKU", for messages
+            fallback: Entity to continue with when the existing one cannot be retrieved
+            
+        Returns:
+            Tuple of (entity, created); entity is None on a 409 without entity_id
+            
+        Raises:
+            Any non-409 error from create_fn
+        """
+        try:
+            self._rate.acquire()
+            return create_fn(), True
+        except Exception as e:
+            if "409" not in str(e) and "Conflict" not in str(e):
+                self._back_off_if_rate_limited(e)
+                # Re-raise if it's a different error
+                self.logger.error("Error creating %s: %s", entity_name, e)
+                raise
+            if entity_id is None:
+                self.logger.error("%s creation failed with 409 but no ID provided: %s", entity_name, e)
+                return None, False
+        
+        label = entity_name[:1].upper() + entity_name[1:]
+        print(f"       ℹ️  {label} already exists, retrieving existing {entity_name} (ID: {entity_id})...")
+        try:
+            existing = get_fn(entity_id)
+            if existing:
+                existing_id = existing.get("Id") if isinstance(existing, dict) else entity_id
+                print(f"       ✅ Using existing {entity_name} with ID: {existing_id}")
+                return existing, False
+            self.logger.warning("%s %s already exists but could not retrieve it", label, entity_id)
+        except Exception as get_error:
+            self.logger.error("Error retrieving existing %s %s: %s", entity_name, entity_id, get_error)
+        
+        # Use the provided ID to continue
+        print(f"       ℹ️  Continuing with existing {entity_name} ID: {entity_id}")
+        return fallback, False
+    
     def _create_specification_field_if_missing(
         self,
         spec_name: str,
@@ -444,7 +649,7 @@ class VTEXProductSKUAgent:
             None (specifications are disabled)
         """
         normalized = normalize_spec_name(spec_name)
-        self.logger.info(f"Specifications disabled - skipping creation of specification field '{normalized}'")
+        self.logger.info("Specifications disabled - skipping creation of specification field '%s'", normalized)
         return None
     
     def _set_product_specifications(
@@ -467,130 +672,7 @@ class VTEXProductSKUAgent:
             category_tree: Optional category tree to check parent categories
         """
         # Specifications are disabled - skip all specification operations
-        self.logger.info(f"Specifications disabled - skipping specification setting for product {product_id}")
-        return
-        # Build category hierarchy if available
-        category_hierarchy = {}
-        if category_tree:
-            categories = category_tree.get("categories", {})
-            departments = category_tree.get("departments", {})
-            
-            # Build hierarchy map
-            for dept_name, dept_data in departments.items():
-                dept_id = dept_data.get("id")
-                if dept_id:
-                    category_hierarchy[dept_id] = {"parent_id": None}
-            
-            for cat_key, cat_data in categories.items():
-                cat_id = cat_data.get("id")
-                parent_id = cat_data.get("parent_id")
-                if cat_id:
-                    category_hierarchy[cat_id] = {"parent_id": parent_id}
-        
-        for spec in specifications:
-            spec_name = spec.get("Name", "")
-            spec_value = spec.get("Value", "")
-            
-            if not spec_name or not spec_value:
-                continue
-            
-            # Get field ID - try current category first, then parent categories
-            normalized = normalize_spec_name(spec_name)
-            field_id = None
-            field_data = None
-            
-            # Try current category
-            spec_key = f"{category_id}::{normalized}"
-            field_data = spec_fields.get(spec_key)
-            
-            # If not found, try parent categories (specs can be inherited)
-            if not field_data and category_hierarchy:
-                current_cat_id = category_id
-                max_depth = 5  # Prevent infinite loops
-                depth = 0
-                
-                while not field_data and current_cat_id and depth < max_depth:
-                    parent_info = category_hierarchy.get(current_cat_id)
-                    if not parent_info:
-                        break
-                    
-                    parent_id = parent_info.get("parent_id")
-                    if parent_id:
-                        parent_key = f"{parent_id}::{normalized}"
-                        field_data = spec_fields.get(parent_key)
-                        if field_data:
-                            self.logger.debug(
-                                f"Found specification '{spec_name}' in parent category {parent_id} "
-                                f"(product category: {category_id})"
-                            )
-                            break
-                        current_cat_id = parent_id
-                    else:
-                        break
-                    depth += 1
-            
-            # If still not found in state, try querying VTEX API directly
-            if not field_data:
-                try:
-                    existing_fields = self.vtex_client.list_specification_fields(category_id)
-                    for field in existing_fields:
-                        if isinstance(field, dict) and field.get("Name") == normalized:
-                            field_id = field.get("Id")
-                            self.logger.info(
-                                f"Found specification field '{spec_name}' (ID: {field_id}) "
-                                f"via VTEX API for category {category_id}"
-                            )
-                            break
-                except Exception as e:
-                    self.logger.debug(f"Could not query VTEX for fields in category {category_id}: {e}")
-            
-            # Get field ID from found data
-            if field_data:
-                field_id = field_data.get("id")
-            
-            # If still not found, create the field automatically (defaults to Text type)
-            if not field_id:
-                self.logger.info(
-                    f"Specification field '{spec_name}' not found. "
-                    f"Creating automatically as Text type (unless overridden in prompt)."
-                )
-                field_id = self._create_specification_field_if_missing(
-                    spec_name=spec_name,
-                    category_id=category_id,
-                    sample_value=spec_value
-                )
-                
-                if not field_id:
-                    self.logger.warning(
-                        f"Could not create or find field ID for specification: {spec_name} "
-                        f"(normalized: {normalized}, category: {category_id}). "
-                        f"Skipping this specification."
-                    )
-                    continue
-            
-            # Get field type if available
-            field_type = "Text"  # Default
-            if field_data:
-                field_type = field_data.get("field_type", "Text")
-            elif spec_key in self.created_spec_fields:
-                field_type = self.created_spec_fields[spec_key].get("field_type", "Text")
-            
-            # Set specification value
-            try:
-                result = self.vtex_client.set_product_specification(
-                    product_id=product_id,
-                    field_id=field_id,
-                    field_value=spec_value,
-                    field_type=field_type
-                )
-                if result:
-                    self.logger.debug(f"✅ Set specification '{spec_name}' = '{spec_value}' for product {product_id}")
-                    print(f"         ✓ Set {spec_name}: {spec_value}")
-                else:
-                    self.logger.warning(f"⚠️  Setting specification '{spec_name}' returned empty result")
-            except Exception as e:
-                self.logger.error(f"❌ Error setting specification {spec_name}: {e}")
-                print(f"         ✗ Failed to set {spec_name}: {str(e)[:50]}")
+        self.logger.info("Specifications disabled - skipping specification setting for product %s", product_id)
     
     def create_single_product(
         self,
@@ -614,149 +696,35 @@ class VTEXProductSKUAgent:
         brands = vtex_category_tree.get("brands", {})
         spec_fields = vtex_specifications.get("specification_fields", {})
         
-        # Helper function to get category ID
-        def get_category_id_for_product(product: Dict[str, Any]) -> Optional[int]:
-            """Get category ID for a product."""
-            categories_list = product.get("categories", [])
-            if not categories_list:
-                category = product.get("category", {})
-                if category:
-                    categories_list = [category]
-            if not categories_list:
-                return None
-            
-            # Same logic as in create_products_and_skus: do not skip "Início"/"Inicio"
-            # so products whose hierarchy starts with that name can still resolve.
-            skip_names = {"home", "root", "default"}
-            dept_name = None
-            dept_index = 0
-            
-            for i, cat_info in enumerate(categories_list):
-                cat_name = cat_info.get("Name", "").strip()
-                cat_name_lower = cat_name.lower()
-                
-                if cat_name_lower in skip_names:
-                    continue
-                
-                for dept_key, dept_data in departments.items():
-                    if dept_key.lower() == cat_name_lower or dept_data.get("name", "").lower() == cat_name_lower:
-                        dept_name = dept_key
-                        dept_index = i
-                        break
-                
-                if dept_name:
-                    break
-            
-            if not dept_name:
-                for cat_info in categories_list:
-                    cat_name = cat_info.get("Name", "").strip()
-                    if cat_name.lower() not in skip_names:
-                        for dept_key, dept_data in departments.items():
-                            if dept_key.lower() == cat_name.lower() or dept_data.get("name", "").lower() == cat_name.lower():
-                                dept_name = dept_key
-                                break
-                        if dept_name:
-                            break
-            
-            if not dept_name or dept_name not in departments:
-                # Fallback: product categories may not start with department name (e.g. "Linhas"
-                # under department "Início"). Try each department as root and match full path.
-                for _dept_key, dept_data in departments.items():
-                    parent_id = dept_data["id"]
-                    matched_any = False
-                    matched_all = True
-                    for cat_info in categories_list:
-                        cat_name = cat_info.get("Name", "").strip()
-                        if not cat_name or cat_name.lower() in skip_names:
-                            continue
-                        found = False
-                        for _cat_key, cat_data in categories.items():
-                            if (
-                                cat_data.get("name", "").strip().lower() == cat_name.lower()
-                                and cat_data.get("parent_id") == parent_id
-                            ):
-                                parent_id = cat_data.get("id")
-                                found = True
-                                matched_any = True
-                                break
-                        if not found:
-                            matched_all = False
-                            break
-                    if matched_all and matched_any:
-                        return parent_id
-                return None
-
-            parent_id = departments[dept_name]["id"]
-
-            if len(categories_list) <= dept_index + 1:
-                return parent_id
-
-            for cat_info in categories_list[dept_index + 1:]:
-                cat_name = cat_info.get("Name", "").strip()
-                if not cat_name or cat_name.lower() in skip_names:
-                    continue
-
-                found = False
-                for cat_key, cat_data in categories.items():
-                    cat_data_name = cat_data.get("name", "").strip()
-                    cat_data_parent = cat_data.get("parent_id")
-
-                    if (
-                        cat_data_name.lower() == cat_name.lower()
-                        and cat_data_parent == parent_id
-                    ):
-                        parent_id = cat_data.get("id")
-                        found = True
-                        break
-
-                if not found:
-                    break
-
-            return parent_id
-        
-        def get_brand_id(brand_name: str) -> Optional[int]:
-            """Get brand ID by name (case-insensitive)."""
-            if not brand_name:
-                return None
-            
-            target = brand_name.strip().lower()
-            
-            for brand_key, brand_data in brands.items():
-                key_name = str(brand_key).strip().lower()
-                data_name = str(brand_data.get("name", "")).strip().lower()
-                
-                if target == key_name or target == data_name:
-                    return brand_data.get("id")
-            
-            return None
-        
         # Get category ID; if missing, ask category tree agent to create/find the path
-        category_id = get_category_id_for_product(product_data)
+        lookups = self._tree_lookups(departments, categories, brands)
+        category_id = self._resolve_category_id(product_data, departments, lookups)
         updated_tree_from_ensure = None
         if not category_id and self.category_tree_agent:
             category_id, updated_tree_from_ensure = self.category_tree_agent.ensure_category_for_product(
                 product_data
             )
             if updated_tree_from_ensure:
-                # Use updated tree for rest of this call (brands etc. unchanged; categories/departments updated)
-                categories = updated_tree_from_ensure.get("categories", {})
+                # Use updated tree for rest of this call (brands unchanged; departments updated)
                 departments = updated_tree_from_ensure.get("departments", {})
         if not category_id:
             product_categories = product_data.get("categories", [])
             category_names = [c.get("Name", "") for c in product_categories]
             available_depts = list(departments.keys())
             self.logger.warning(
-                f"Could not determine category ID for product. "
-                f"Product categories: {category_names}. "
-                f"Available departments: {available_depts}. Skipping product."
+                "Could not determine category ID for product. "
+                "Product categories: %s. "
+                "Available departments: %s. Skipping product.",
+                category_names,
+                available_depts
             )
             return None
 
         # Get brand ID (case-insensitive)
         brand_name = product_data.get("brand", {}).get("Name", "Default")
-        brand_id = get_brand_id(brand_name)
+        brand_id = self._resolve_brand_id(brand_name, lookups)
         if not brand_id:
-            self.logger.warning(f"Could not determine brand ID for {brand_name}, skipping")
+            self.logger.warning("Could not determine brand ID for %s, skipping", brand_name)
             return None
         
         # Create product
@@ -767,9 +735,8 @@ class VTEXProductSKUAgent:
         extracted_product_id = product_info.get("ProductId")
         product_id_param = extract_product_id(extracted_product_id)
         
-        product_id = None
-        try:
-            product = self.vtex_client.create_product(
+        product, created = self._create_or_get(
+            lambda: self.vtex_client.create_product(
                 name=product_name,
                 category_id=category_id,
                 brand_id=brand_id,
@@ -779,53 +746,32 @@ class VTEXProductSKUAgent:
                 is_visible=True,  # Always set product visible when creating
                 show_without_stock=product_info.get("ShowWithoutStock", True),
                 product_id=product_id_param
-            )
-            
-            product_id = product.get("Id") if isinstance(product, dict) else None
-            if product_id:
-                print(f"       ✅ Product created with ID: {product_id}")
-                # Ensure IsActive is set to True (in case product already existed)
-                try:
-                    if not product.get("IsActive", False) or not product.get("IsVisible", False):
-                        self.vtex_client.update_product(product_id, is_active=True, is_visible=True)
-                        if not product.get("IsActive", False):
-                            print(f"       ✓ Updated product IsActive flag to True")
-                        if not product.get("IsVisible", False):
-                            print(f"       ✓ Updated product IsVisible flag to True")
-                except Exception as update_error:
-                    self.logger.warning(f"Could not update product flags for product {product_id}: {update_error}")
-        except Exception as e:
-            # Handle case where product already exists (409 Conflict)
-            if "409" in str(e) or "Conflict" in str(e):
-                if product_id_param is not None:
-                    print(f"       ℹ️  Product already exists, retrieving existing product (ID: {product_id_param})...")
-                    try:
-                        product = self.vtex_client.get_product(product_id_param)
-                        if product:
-                            product_id = product.get("Id") if isinstance(product, dict) else product_id_param
-                            print(f"       ✅ Using existing product with ID: {product_id}")
-                        else:
-                            self.logger.warning(f"Product {product_id_param} already exists but could not retrieve it")
-                            # Use the provided product ID to continue
-                            product_id = product_id_param
-                            product = {"Id": product_id, "Name": product_info.get("Name", "Existing Product")}
-                            print(f"       ℹ️  Continuing with existing product ID: {product_id}")
-                    except Exception as get_error:
-                        self.logger.error(f"Error retrieving existing product {product_id_param}: {get_error}")
-                        # Use the provided product ID to continue
-                        product_id = product_id_param
-                        product = {"Id": product_id, "Name": product_info.get("Name", "Existing Product")}
-                        print(f"       ℹ️  Continuing with existing product ID: {product_id}")
-                else:
-                    self.logger.error(f"Product creation failed with 409 but no product_id provided: {e}")
-                    return None
-            else:
-                # Re-raise if it's a different error
-                self.logger.error(f"Error creating product: {e}")
-                raise
+            ),
+            self.vtex_client.get_product,
+            product_id_param,
+            "product",
+            {"Id": product_id_param, "Name": product_info.get("Name", "Existing Product")}
+        )
+        if product is None:
+            return None
+        
+        product_id = product.get("Id") if isinstance(product, dict) else None
+        if product_id and created:
+            print(f"       ✅ Product created with ID: {product_id}")
+            # Ensure IsActive is set to True (in case product already existed)
+            try:
+                if not product.get("IsActive", False) or not product.get("IsVisible", False):
+                    self._rate.acquire()
+                    self.vtex_client.update_product(product_id, is_active=True, is_visible=True)
+                    if not product.get("IsActive", False):
+                        print(f"       ✓ Updated product IsActive flag to True")
+                    if not product.get("IsVisible", False):
+                        print(f"       ✓ Updated product IsVisible flag to True")
+            except Exception as update_error:
+                self.logger.warning("Could not update product flags for product %s: %s", product_id, update_error)
         
         if not product_id:
-            self.logger.warning(f"Could not get product ID, skipping")
+            self.logger.warning("Could not get product ID, skipping")
             return None
         
         if extracted_product_id:
@@ -863,23 +809,25 @@ class VTEXProductSKUAgent:
         
         self.products[product_url] = product_info_dict
         
-        time.sleep(0.5)  # Rate limiting
-        
         return product_info_dict
     
     def create_single_sku(
         self,
         product_id: int,
         product_url: str,
-        sku_data: Dict[str, Any]
+        sku_data: Dict[str, Any],
+        add_to_product: bool = True
     ) -> Optional[Dict[str, Any]]:
         """
-        Create a single SKU for a product.
+        Create a single SKU for a product. Safe to call concurrently for the SKUs of
+        one product.
         
         Args:
             product_id: VTEX product ID
             product_url: Product URL (key in self.products)
             sku_data: SKU data from legacy site
+            add_to_product: Append the SKU to the product's SKU list; concurrent callers pass
+                False and call add_sku_to_product in input order instead
             
         Returns:
             Dictionary with SKU info including sku_id, or None if failed
@@ -893,8 +841,8 @@ class VTEXProductSKUAgent:
         if extracted_sku_id:
             print(f"         ℹ️  Extracted SKU ID: {extracted_sku_id}")
         
-        try:
-            sku = self.vtex_client.create_sku(
+        sku, _created = self._create_or_get(
+            lambda: self.vtex_client.create_sku(
                 product_id=product_id,
                 name=sku_name,
                 ean=sku_data.get("EAN", f"EAN{product_id}"),
@@ -911,41 +859,18 @@ class VTEXProductSKUAgent:
                 length=1,
                 weight=1,  # Set unpackaged weight to 1
                 sku_id=sku_id_param
-            )
-        except Exception as e:
-            # Handle case where SKU already exists (409 Conflict)
-            if "409" in str(e) or "Conflict" in str(e):
-                if sku_id_param is not None:
-                    print(f"       ℹ️  SKU already exists, retrieving existing SKU (ID: {sku_id_param})...")
-                    try:
-                        sku = self.vtex_client.get_sku(sku_id_param)
-                        if sku:
-                            sku_id = sku.get("Id") if isinstance(sku, dict) else sku_id_param
-                            print(f"       ✅ Using existing SKU with ID: {sku_id}")
-                        else:
-                            self.logger.warning(f"SKU {sku_id_param} already exists but could not retrieve it")
-                            # Use the provided SKU ID to continue
-                            sku_id = sku_id_param
-                            sku = {"Id": sku_id, "Name": sku_name, "ProductId": product_id}
-                    except Exception as get_error:
-                        self.logger.error(f"Error retrieving existing SKU {sku_id_param}: {get_error}")
-                        # Use the provided SKU ID to continue
-                        sku_id = sku_id_param
-                        sku = {"Id": sku_id, "Name": sku_name, "ProductId": product_id}
-                    
-                    # Note: Price and inventory are NOT set here for existing SKUs
-                    # They should be set after images are added in the correct order
-                else:
-                    self.logger.error(f"SKU creation failed with 409 but no sku_id provided: {e}")
-                    return None
-            else:
-                # Re-raise if it's a different error
-                self.logger.error(f"Error creating SKU: {e}")
-                raise
+            ),
+            self.vtex_client.get_sku,
+            sku_id_param,
+            "SKU",
+            {"Id": sku_id_param, "Name": sku_name, "ProductId": product_id}
+        )
+        if sku is None:
+            return None
         
         sku_id = sku.get("Id") if isinstance(sku, dict) else None
         if not sku_id:
-            self.logger.warning(f"Could not get SKU ID for {sku_name}")
+            self.logger.warning("Could not get SKU ID for %s", sku_name)
             return None
         
         # Note: SKU activation (IsActive=true) is done after images are associated (e.g. in migration_agent).
@@ -962,12 +887,17 @@ class VTEXProductSKUAgent:
             "created": True
         }
         
-        # Add to product's SKU list
-        if product_url in self.products:
-            self.products[product_url]["skus"].append(sku_info)
+        if add_to_product:
+            self.add_sku_to_product(product_url, sku_info)
         
         return sku_info
     
+    def add_sku_to_product(self, product_url: str, sku_info: Dict[str, Any]) -> None:
+        """Append a created SKU to its product's SKU list (no-op for unknown products)."""
+        with self._products_lock:
+            if product_url in self.products:
+                self.products[product_url]["skus"].append(sku_info)
+    
     def set_sku_price_and_inventory(
         self,
         sku_id: int,
@@ -990,23 +920,49 @@ class VTEXProductSKUAgent:
         try:
             price_value = sku_data.get("Price") or 0
             list_price_value = sku_data.get("ListPrice") or price_value
+            self._rate.acquire()
             self.vtex_client.set_sku_price(sku_id, price_value, list_price_value)
             print(f"         ✓ Price set: {price_value}")
         except Exception as price_error:
-            self.logger.warning(f"Could not set price for SKU {sku_id}: {price_error}")
+            self.logger.warning("Could not set price for SKU %s: %s", sku_id, price_error)
             success = False
         
         # Set inventory
         try:
             inventory_quantity = sku_data.get("Inventory", 0)  # Default to 0 if not specified
+            self._rate.acquire()
             self.vtex_client.set_sku_inventory(sku_id, quantity=inventory_quantity)
             print(f"         ✓ Inventory set: {inventory_quantity}")
         except Exception as inventory_error:
-            self.logger.warning(f"Could not set inventory for SKU {sku_id}: {inventory_error}")
+            self.logger.warning("Could not set inventory for SKU %s: %s", sku_id, inventory_error)
             success = False
         
         return success
     
+    def _replay_checkpoints(self, products: Dict[str, Any]) -> int:
+        """
+        Merge products from the checkpoint log into products (later entries win).
+        
+        Returns:
+            Number of checkpointed products applied
+        """
+        replayed = 0
+        for record in load_checkpoints("vtex_products_skus"):
+            if not isinstance(record, dict) or "url" not in record or not isinstance(record.get("product"), dict):
+                continue
+            products[record["url"]] = record["product"]
+            replayed += 1
+        if replayed:
+            self.logger.info("Replayed %d checkpointed product(s) from a previous run", replayed)
+        return replayed
+    
+    def _save_snapshot(self) -> Dict[str, Any]:
+        """Write the products to state and truncate the checkpoint log they now cover."""
+        output = self._format_output()
+        save_state("vtex_products_skus", output)
+        clear_checkpoints("vtex_products_skus")
+        return output
+    
     def _format_output(self) -> Dict[str, Any]:
         """Format output JSON."""
         total_skus = sum(len(p.get("skus", [])) for p in self.products.values())
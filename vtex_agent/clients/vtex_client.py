@@ -1,11 +1,33 @@
 """VTEX Catalog API client for creating categories, brands, products, and SKUs."""
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, Any, List, Optional
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Connection pool size per host; sized for concurrent callers sharing one client
+HTTP_POOL_SIZE = 64
+
+# Transient VTEX statuses retried by the session adapter (with exponential backoff / Retry-After)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class _VTEXRetry(Retry):
+    """
+    Retry policy for VTEX calls: idempotent methods retry on any RETRY_STATUSES code. POST
+    (creates) is not in allowed_methods, so it is never retried after a read error or 5xx,
+    which could duplicate an entity; it is retried only on 429, which VTEX rejects before
+    processing the request.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method and method.upper() == "POST":
+            return status_code == 429
+        return super().is_retry(method, status_code, has_retry_after)
+
 
 class VTEXClient:
     """Client for VTEX Catalog API operations."""
@@ -37,6 +59,31 @@ class VTEXClient:
             "Content-Type": "application/json",
             "Accept": "application/json"
         }
+        self.session = self._build_session()
+    
+    def _build_session(self) -> requests.Session:
+        """
+        Build a keep-alive session so repeated VTEX calls reuse TCP/TLS connections.
+        Rate limits (429) and transient 5xx responses are retried by the adapter with
+        exponential backoff, honouring Retry-After; the final response is returned as-is.
+        """
+        session = requests.Session()
+        retry = _VTEXRetry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=["GET", "PUT", "DELETE"],
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_POOL_SIZE,
+            pool_maxsize=HTTP_POOL_SIZE,
+            max_retries=retry
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
     
     def _request(
         self,
@@ -49,7 +96,7 @@ class VTEXClient:
         url = f"{self.base_url}/api/catalog/{endpoint}"
         
         try:
-            response = requests.request(
+            response = self.session.request(
                 method=method,
                 url=url,
                 json=data,
@@ -541,11 +588,15 @@ class VTEXClient:
                     )
                     if need_update:
                         try:
-                            self.update_product(product_id, is_active=True, is_visible=True)
+                            self.update_product(
+                                product_id, is_active=True, is_visible=True, current_product=existing_product
+                            )
                             if not existing_product.get("IsActive", False):
                                 print(f"   ✓ Updated product IsActive flag to True")
                             if not existing_product.get("IsVisible", False):
                                 print(f"   ✓ Updated product IsVisible flag to True")
+                            # Return the flags as now stored so callers don't update them again
+                            existing_product = {**existing_product, "IsActive": True, "IsVisible": True}
                         except Exception as update_error:
                             print(f"   ⚠️  Could not update product flags: {update_error}")
                     return existing_product
@@ -588,7 +639,8 @@ class VTEXClient:
         product_id: int,
         is_active: Optional[bool] = None,
         is_visible: Optional[bool] = None,
-        show_without_stock: Optional[bool] = None
+        show_without_stock: Optional[bool] = None,
+        current_product: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Update a product's IsActive, IsVisible and ShowWithoutStock flags.
@@ -598,12 +650,16 @@ class VTEXClient:
             is_active: Whether product is active (Display on website)
             is_visible: Whether product is visible
             show_without_stock: Show product even without stock
+            current_product: Product data the caller just fetched (skips the GET)
             
         Returns:
             Updated product data
         """
-        # First get the current product data
-        current_product = self.get_product(product_id)
+        # First get the current product data (PUT replaces the whole product)
+        if current_product is not None:
+            current_product = dict(current_product)
+        else:
+            current_product = self.get_product(product_id)
         if not current_product:
             raise ValueError(f"Product {product_id} not found")
         
@@ -793,7 +849,8 @@ class VTEXClient:
             
         Note:
             Uses VTEX Pricing API: PUT https://api.vtex.com/{account_name}/pricing/prices/{skuId}
-            With markup=0, costPrice is set to the website price, which results in basePrice = costPrice
+            With markup=0, costPrice is set to the website price, which results in basePrice = costPrice.
+            listPrice is only sent when it differs from the base price.
         """
         # Use VTEX Pricing API endpoint
         pricing_base_url = f"https://api.vtex.com/{self.account_name}"
@@ -806,9 +863,12 @@ class VTEXClient:
             "markup": 0,  # Markup is always zero
             "costPrice": price  # Website price as costPrice (with markup=0, basePrice = costPrice = website price)
         }
+        # VTEX defaults listPrice to basePrice, so only send it when it differs
+        if list_price is not None and list_price != price:
+            data["listPrice"] = list_price
         
         try:
-            response = requests.put(
+            response = self.session.put(
                 url,
                 json=data,
                 headers=self.headers,
@@ -901,7 +961,7 @@ class VTEXClient:
         url = f"{logistics_base_url}{endpoint}"
         
         try:
-            response = requests.get(
+            response = self.session.get(
                 url,
                 headers=self.headers,
                 timeout=30
@@ -957,7 +1017,7 @@ class VTEXClient:
         }
         
         try:
-            response = requests.put(
+            response = self.session.put(
                 url,
                 json=data,
                 headers=self.headers,
@@ -1061,7 +1121,7 @@ class VTEXClient:
             "X-VTEX-API-AppToken": self.app_token
         }
         url = f"{self.base_url}/api/catalog/{endpoint}"
-        response = requests.post(url, files=files, headers=headers, timeout=60)
+        response = self.session.post(url, files=files, headers=headers, timeout=60)
         
         if response.status_code == 200:
             return response.json()
@@ -2,18 +2,44 @@
 import re
 import os
 import base64
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from urllib.parse import urljoin, urlparse
 from dotenv import load_dotenv
 from ..utils.logger import get_agent_logger
+from ..utils.rate_limiter import TokenBucket
 
 load_dotenv()
 
 # Initialize logger for image processing
 logger = get_agent_logger("image_manager")
 
+# Paces GitHub content writes to stay under its secondary rate limits (shared across threads)
+_github_write_rate = TokenBucket(rate=1, capacity=5)
+
+# Each GitHub write moves the branch head; concurrent writers would conflict (409 / stale
+# expectedHeadOid), so commits are made one at a time even when products upload in parallel
+_github_commit_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    """Build a keep-alive session so image downloads and GitHub calls reuse TCP/TLS connections."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=20, pool_maxsize=50)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Shared by all downloads and GitHub API calls in this module
+_session = _build_session()
+
+# Read size when streaming image downloads to disk
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
 
 def extract_high_res_images(html_content: str, base_url: str) -> List[str]:
     """
@@ -180,17 +206,21 @@ def download_image(image_url: str, output_path: str) -> bool:
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
         }
         logger.debug(f"Sending HTTP request to {image_url}")
-        response = requests.get(image_url, headers=headers, timeout=30)
-        logger.debug(f"Response status: {response.status_code}")
-        response.raise_for_status()
-        
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(output_path) if os.path.dirname(output_path) else ".", exist_ok=True)
-        
-        file_size = len(response.content)
-        logger.debug(f"Saving {file_size:,} bytes to {output_path}")
-        with open(output_path, "wb") as f:
-            f.write(response.content)
+        # Stream the body to disk in chunks instead of holding the whole image in memory
+        with _session.get(image_url, headers=headers, timeout=30, stream=True) as response:
+            logger.debug(f"Response status: {response.status_code}")
+            response.raise_for_status()
+            
+            # Ensure directory exists
+            os.makedirs(os.path.dirname(output_path) if os.path.dirname(output_path) else ".", exist_ok=True)
+            
+            logger.debug(f"Saving to {output_path}")
+            file_size = 0
+            with open(output_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    if chunk:
+                        f.write(chunk)
+                        file_size += len(chunk)
         
         logger.info(f"Download successful: {file_size:,} bytes from {image_url}")
         print(f"       ✅ Download successful")
@@ -210,27 +240,15 @@ def download_image(image_url: str, output_path: str) -> bool:
         return False
 
 
-def upload_image_to_github(
-    image_path: str,
-    filename: str,
-    repo_path: str = "images",
-    github_token: Optional[str] = None,
-    github_repo: Optional[str] = None,
-    github_branch: str = "main"
-) -> Optional[str]:
+def _resolve_github_credentials(
+    github_token: Optional[str],
+    github_repo: Optional[str]
+) -> Tuple[str, str]:
     """
-    Upload an image to GitHub repository and return the raw GitHub URL.
+    Resolve the GitHub token and "owner/repo" from arguments or environment.
     
-    Args:
-        image_path: Local path to the image file
-        filename: Name for the file in GitHub (e.g., "10010801_1.jpg")
-        repo_path: Path within the repository (e.g., "images" or "products/images")
-        github_token: GitHub personal access token (or from env GITHUB_TOKEN)
-        github_repo: Repository in format "username/repo" (or from env GITHUB_REPO)
-        github_branch: Branch name (default: "main")
-        
     Returns:
-        Raw GitHub URL if successful, None otherwise
+        Tuple of (github_token, "owner/repo")
     """
     github_token = github_token or os.getenv("GITHUB_TOKEN")
     github_repo = github_repo or os.getenv("GITHUB_REPO")
@@ -252,6 +270,32 @@ def upload_image_to_github(
             raise ValueError(
                 f"Invalid GitHub repo format. Expected 'owner/repo' or full URL, got: {github_repo}"
             )
+    return github_token, github_repo
+
+
+def upload_image_to_github(
+    image_path: str,
+    filename: str,
+    repo_path: str = "images",
+    github_token: Optional[str] = None,
+    github_repo: Optional[str] = None,
+    github_branch: str = "main"
+) -> Optional[str]:
+    """
+    Upload an image to GitHub repository and return the raw GitHub URL.
+    
+    Args:
+        image_path: Local path to the image file
+        filename: Name for the file in GitHub (e.g., "10010801_1.jpg")
+        repo_path: Path within the repository (e.g., "images" or "products/images")
+        github_token: GitHub personal access token (or from env GITHUB_TOKEN)
+        github_repo: Repository in format "username/repo" (or from env GITHUB_REPO)
+        github_branch: Branch name (default: "main")
+        
+    Returns:
+        Raw GitHub URL if successful, None otherwise
+    """
+    github_token, github_repo = _resolve_github_credentials(github_token, github_repo)
     
     print(f"       📤 Step 2: Uploading to GitHub...")
     logger.debug(f"Uploading to GitHub - Repo: {github_repo}, Path: {repo_path}/{filename}")
@@ -284,7 +328,7 @@ def upload_image_to_github(
     
     # Check if file already exists
     logger.debug(f"Checking if file exists in repository...")
-    check_response = requests.get(api_url, headers={
+    check_response = _session.get(api_url, headers={
         "Authorization": f"token {github_token}",
         "Accept": "application/vnd.github.v3+json"
     })
@@ -311,10 +355,12 @@ def upload_image_to_github(
     # Upload to GitHub
     try:
         logger.debug(f"Uploading to GitHub API...")
-        response = requests.put(api_url, json=data, headers={
-            "Authorization": f"token {github_token}",
-            "Accept": "application/vnd.github.v3+json"
-        }, timeout=30)
+        with _github_commit_lock:
+            _github_write_rate.acquire()
+            response = _session.put(api_url, json=data, headers={
+                "Authorization": f"token {github_token}",
+                "Accept": "application/vnd.github.v3+json"
+            }, timeout=30)
         logger.debug(f"Response status: {response.status_code}")
         response.raise_for_status()
         
@@ -349,6 +395,118 @@ def upload_image_to_github(
         return None
 
 
+def batch_commit_images(
+    files: List[Tuple[str, str]],
+    message: str,
+    github_token: Optional[str] = None,
+    github_repo: Optional[str] = None,
+    github_branch: str = "main"
+) -> Optional[List[str]]:
+    """
+    Commit several images to GitHub in a single commit (GraphQL createCommitOnBranch).
+    
+    Args:
+        files: List of (repository path, local image path), e.g. ("images/10010801_1.jpg", "/tmp/...")
+        message: Commit message
+        github_token: GitHub personal access token (or from env GITHUB_TOKEN)
+        github_repo: Repository in format "username/repo" (or from env GITHUB_REPO)
+        github_branch: Branch name (default: "main")
+        
+    Returns:
+        Raw GitHub URLs in the same order as files, or None if the commit failed
+    """
+    github_token, github_repo = _resolve_github_credentials(github_token, github_repo)
+    headers = {
+        "Authorization": f"token {github_token}",
+        "Accept": "application/vnd.github.v3+json"
+    }
+    
+    try:
+        additions = []
+        for repo_file_path, image_path in files:
+            with open(image_path, "rb") as f:
+                contents = base64.b64encode(f.read()).decode("utf-8")
+            additions.append({"path": repo_file_path, "contents": contents})
+        
+        with _github_commit_lock:
+            # The mutation needs the current branch head
+            ref_response = _session.get(
+                f"https://api.github.com/repos/{github_repo}/git/ref/heads/{github_branch}",
+                headers=headers,
+                timeout=30
+            )
+            ref_response.raise_for_status()
+            head_oid = ref_response.json()["object"]["sha"]
+        
+            mutation = """
+                mutation($input: CreateCommitOnBranchInput!) {
+                    createCommitOnBranch(input: $input) { commit { oid } }
+                }
+            """
+            variables = {
+                "input": {
+                    "branch": {"repositoryNameWithOwner": github_repo, "branchName": github_branch},
+                    "message": {"headline": message},
+                    "fileChanges": {"additions": additions},
+                    "expectedHeadOid": head_oid,
+                }
+            }
+            _github_write_rate.acquire()
+            response = _session.post(
+                "https://api.github.com/graphql",
+                json={"query": mutation, "variables": variables},
+                headers=headers,
+                timeout=60
+            )
+        response.raise_for_status()
+        result = response.json()
+        if result.get("errors"):
+            logger.error(f"GitHub batch commit failed: {str(result['errors'])[:300]}")
+            return None
+    except Exception as e:
+        logger.error(f"GitHub batch commit failed: {type(e).__name__}: {str(e)}")
+        return None
+    
+    logger.info(f"Batch commit successful: {len(files)} file(s) in one commit")
+    return [
+        f"https://raw.githubusercontent.com/{github_repo}/{github_branch}/{repo_file_path}"
+        for repo_file_path, _ in files
+    ]
+
+
+def _image_filename(image_url: str, sku_id: int, sequence: int) -> str:
+    """Build the GitHub filename for an image: {sku_id}_{sequence}.{ext}."""
+    # Determine file extension from URL or default to jpg
+    parsed_url = urlparse(image_url)
+    # Get the path without query parameters
+    path_without_query = parsed_url.path.split('?')[0]
+    
+    # Extract extension, but clean it up
+    ext = os.path.splitext(path_without_query)[1] or ""
+    
+    # Remove dimension suffixes like -1200Wx1200H, -800x600, etc.
+    # Pattern: -[number][WwHh]x[number][WwHh] or -[number]x[number]
+    ext = re.sub(r'-\d+[WwHh]?x\d+[WwHh]?', '', ext, flags=re.I)
+    
+    # Normalize to standard image extensions
+    ext_lower = ext.lower()
+    if ext_lower in ['.jpg', '.jpeg']:
+        ext = '.jpg'
+    elif ext_lower == '.png':
+        ext = '.png'
+    elif ext_lower == '.webp':
+        ext = '.webp'
+    elif ext_lower == '.gif':
+        ext = '.gif'
+    elif ext_lower == '.svg':
+        ext = '.svg'
+    else:
+        # Default to .jpg if extension is not recognized or empty
+        ext = '.jpg'
+    
+    return f"{sku_id}_{sequence}{ext}"
+
+
 def process_and_upload_images_to_github(
     image_urls: List[str],
     sku_id: int,
@@ -361,6 +519,9 @@ def process_and_upload_images_to_github(
     """
     Download images, rename them, and upload to GitHub.
     
+    All downloaded images are committed together in one GitHub commit; if that fails they
+    are uploaded one by one.
+    
     Args:
         image_urls: List of image URLs to process
         sku_id: SKU ID for naming (format: {sku_id}_{sequence}.jpg)
@@ -375,90 +536,74 @@ def process_and_upload_images_to_github(
     """
     os.makedirs(temp_dir, exist_ok=True)
     uploaded_images = []
+    downloaded = []  # (entry in uploaded_images, temp_path)
     
+    # Step 1: download every image
     for sequence, image_url in enumerate(image_urls, start=1):
-        # Determine file extension from URL or default to jpg
-        parsed_url = urlparse(image_url)
-        # Get the path without query parameters
-        path_without_query = parsed_url.path.split('?')[0]
-        
-        # Extract extension, but clean it up
-        ext = os.path.splitext(path_without_query)[1] or ""
-        
-        # Remove dimension suffixes like -1200Wx1200H, -800x600, etc.
-        # Pattern: -[number][WwHh]x[number][WwHh] or -[number]x[number]
-        ext = re.sub(r'-\d+[WwHh]?x\d+[WwHh]?', '', ext, flags=re.I)
-        
-        # Normalize to standard image extensions
-        ext_lower = ext.lower()
-        if ext_lower in ['.jpg', '.jpeg']:
-            ext = '.jpg'
-        elif ext_lower == '.png':
-            ext = '.png'
-        elif ext_lower == '.webp':
-            ext = '.webp'
-        elif ext_lower == '.gif':
-            ext = '.gif'
-        elif ext_lower == '.svg':
-            ext = '.svg'
-        else:
-            # Default to .jpg if extension is not recognized or empty
-            ext = '.jpg'
-        
         # Create filename: {sku_id}_{sequence}.{ext}
-        filename = f"{sku_id}_{sequence}{ext}"
+        filename = _image_filename(image_url, sku_id, sequence)
         temp_path = os.path.join(temp_dir, filename)
         
         print(f"\n     [{sequence}/{len(image_urls)}] Processing image: {filename}")
         print(f"     {'='*60}")
         
+        entry = {
+            "url": None,
+            "name": filename,
+            "sequence": sequence,
+            "original_url": image_url,
+        }
+        uploaded_images.append(entry)
+        
         # Download image
         download_success = download_image(image_url, temp_path)
         if not download_success:
-            uploaded_images.append({
-                "url": None,
-                "name": filename,
-                "sequence": sequence,
-                "original_url": image_url,
-                "status": "failed",
-                "error": "Failed to download image from legacy site"
-            })
+            entry["status"] = "failed"
+            entry["error"] = "Failed to download image from legacy site"
             logger.warning(f"Skipping image {filename}: Download failed, cannot proceed with upload")
             print(f"     ❌ SKIPPING: Download failed")
             print(f"     {'='*60}")
             continue
-        
-        # Upload to GitHub
-        raw_github_url = upload_image_to_github(
-            image_path=temp_path,
-            filename=filename,
-            repo_path=repo_path,
+        downloaded.append((entry, temp_path))
+    
+    # Step 2: upload to GitHub, in a single commit when there is more than one image
+    raw_urls = None
+    if len(downloaded) > 1:
+        print(f"\n       📤 Step 2: Uploading {len(downloaded)} images to GitHub in one commit...")
+        raw_urls = batch_commit_images(
+            files=[(f"{repo_path}/{entry['name']}", temp_path) for entry, temp_path in downloaded],
+            message=f"Upload images for SKU {sku_id}",
             github_token=github_token,
             github_repo=github_repo,
             github_branch=github_branch
         )
+        if raw_urls is None:
+            print(f"       ⚠️  Batch commit failed, uploading images one by one")
+    
+    for position, (entry, temp_path) in enumerate(downloaded):
+        filename = entry["name"]
+        if raw_urls is not None:
+            raw_github_url = raw_urls[position]
+        else:
+            raw_github_url = upload_image_to_github(
+                image_path=temp_path,
+                filename=filename,
+                repo_path=repo_path,
+                github_token=github_token,
+                github_repo=github_repo,
+                github_branch=github_branch
+            )
         
         if raw_github_url:
-            uploaded_images.append({
-                "url": raw_github_url,
-                "name": filename,
-                "sequence": sequence,
-                "original_url": image_url,
-                "status": "uploaded"
-            })
+            entry["url"] = raw_github_url
+            entry["status"] = "uploaded"
             logger.info(f"Image {filename} successfully processed and uploaded to GitHub")
-            print(f"       ✅ Uploaded to GitHub")
+            print(f"       ✅ Uploaded to GitHub: {filename}")
         else:
-            uploaded_images.append({
-                "url": None,
-                "name": filename,
-                "sequence": sequence,
-                "original_url": image_url,
-                "status": "failed",
-                "error": "GitHub upload returned None - check GitHub credentials and repository permissions"
-            })
+            entry["status"] = "failed"
+            entry["error"] = "GitHub upload returned None - check GitHub credentials and repository permissions"
             logger.error(f"Failed to upload {filename} to GitHub - check credentials and permissions")
-            print(f"       ❌ Failed to upload to GitHub")
+            print(f"       ❌ Failed to upload to GitHub: {filename}")
         
         # Clean up temp file
         try:
@@ -468,4 +613,3 @@ def process_and_upload_images_to_github(
             pass
     
     return uploaded_images
-
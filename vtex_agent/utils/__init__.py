@@ -2,6 +2,8 @@
 from .error_handler import retry_with_exponential_backoff
 from .validation import normalize_spec_name, normalize_category_name, validate_json_schema
 from .logger import get_agent_logger
+from .console import buffered_stdout
+from .rate_limiter import TokenBucket
 
 __all__ = [
     "retry_with_exponential_backoff",
@@ -9,5 +11,7 @@ __all__ = [
     "normalize_category_name",
     "validate_json_schema",
     "get_agent_logger",
+    "buffered_stdout",
+    "TokenBucket",
 ]
 
@@ -0,0 +1,60 @@
+"""Console output utilities."""
+import io
+import queue
+import sys
+import threading
+from contextlib import contextmanager, redirect_stdout
+
+
+class _QueueWriter(io.TextIOBase):
+    """File-like object that hands written text to a queue instead of the terminal."""
+
+    def __init__(self, output_queue: queue.Queue):
+        self._queue = output_queue
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if text:
+            self._queue.put(text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+@contextmanager
+def buffered_stdout():
+    """
+    Route print() output through a single background writer thread.
+
+    Inside the block, print() only enqueues text, so callers (including worker
+    threads) never block on terminal I/O. Output order is preserved because a
+    single consumer writes everything. On exit the queue is fully drained
+    before stdout is restored.
+    """
+    target = sys.stdout
+    output_queue: queue.Queue = queue.Queue()
+
+    def _drain():
+        while True:
+            chunk = output_queue.get()
+            if chunk is None:
+                break
+            try:
+                target.write(chunk)
+                if output_queue.empty():
+                    target.flush()
+            except Exception:
+                pass
+
+    writer = threading.Thread(target=_drain, name="stdout-writer", daemon=True)
+    writer.start()
+    try:
+        with redirect_stdout(_QueueWriter(output_queue)):
+            yield
+    finally:
+        output_queue.put(None)
+        writer.join()
+        target.flush()
@@ -0,0 +1,77 @@
+"""Rate limiting utilities for outbound API calls."""
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. Each
+    acquire() consumes one token, sleeping only when the bucket is empty, so
+    callers are paced only when they actually make requests.
+
+    The rate adapts to throttling: penalize() pauses all callers and halves the
+    rate (down to `min_rate`), and the rate then climbs back linearly to its
+    configured value over RECOVERY_SECONDS without further penalties.
+    """
+
+    # Seconds for a penalized rate to climb back from zero to the configured rate
+    RECOVERY_SECONDS = 30.0
+
+    def __init__(self, rate: float = 5.0, capacity: int = 10, min_rate: float = None):
+        """
+        Args:
+            rate: Tokens added per second (sustained requests per second)
+            capacity: Maximum burst size
+            min_rate: Lowest rate penalties can reduce to (default: rate / 8)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._max_rate = rate
+        self._min_rate = min_rate if min_rate is not None else rate / 8
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            if self.rate < self._max_rate:
+                self.rate = min(self._max_rate, self.rate + elapsed * self._max_rate / self.RECOVERY_SECONDS)
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated_at = now
+
+    def acquire(self) -> None:
+        """Take one token, blocking until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    wait_time = self._blocked_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+    def penalize(self, seconds: float) -> None:
+        """
+        Hold back all callers for `seconds` (e.g. a 429's Retry-After) and halve the rate.
+
+        Penalties overlap rather than add up: concurrent calls (several workers hitting
+        the same 429) extend the pause to the latest deadline only, and the rate is halved
+        once per pause.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._blocked_until:
+                self._refill(now)
+                self.rate = max(self._min_rate, self.rate / 2)
+            self._blocked_until = max(self._blocked_until, now + seconds)
+            # Start refilling from empty once the pause ends
+            self._tokens = 0.0
+            self._updated_at = self._blocked_until
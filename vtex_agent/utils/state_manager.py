@@ -1,8 +1,14 @@
 """State management for persistent workflow execution."""
 import json
 import os
+import threading
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # Optional; state falls back to the standard json module
 
 STATE_DIR = Path(__file__).parent.parent.parent / "state"
 
@@ -29,6 +35,37 @@ def ensure_state_dir():
     STATE_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def _write_json(path: Path, data: Any) -> None:
+    """Write data as indented UTF-8 JSON, using orjson when installed."""
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def _read_json(path: Path) -> Any:
+    """Read a JSON file, using orjson when installed."""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _dumps_line(record: Any) -> str:
+    """Serialize a record as a single compact JSON line, using orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(record, ensure_ascii=False)
+
+
+def _loads_line(line: str) -> Any:
+    """Parse a single JSON line, using orjson when installed."""
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
 def save_state(step_name: str, data: Dict[str, Any]) -> str:
     """
     Save state to a JSON file with numeric prefix based on workflow order.
@@ -61,8 +98,7 @@ def save_state(step_name: str, data: Dict[str, Any]) -> str:
         except Exception:
             pass  # Ignore errors when removing old file
     
-    with open(state_file, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    _write_json(state_file, data)
     return str(state_file)
 
 
@@ -84,14 +120,12 @@ def load_state(step_name: str) -> Optional[Dict[str, Any]]:
     if order is not None:
         state_file = STATE_DIR / f"{order:02d}_{step_name}.json"
         if state_file.exists():
-            with open(state_file, "r", encoding="utf-8") as f:
-                return json.load(f)
+            return _read_json(state_file)
     
     # Fallback to unnumbered filename (for backward compatibility)
     state_file = STATE_DIR / f"{step_name}.json"
     if state_file.exists():
-        with open(state_file, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return _read_json(state_file)
     
     return None
 
@@ -107,6 +141,77 @@ def get_state_path(step_name: str) -> str:
     return str(STATE_DIR / f"{step_name}.json")
 
 
+def _checkpoint_path(step_name: str) -> Path:
+    """Path of the append-only checkpoint log for a step (same numbering as its state file)."""
+    order = STEP_ORDER.get(step_name)
+    if order is not None:
+        return STATE_DIR / f"{order:02d}_{step_name}.ndjson"
+    return STATE_DIR / f"{step_name}.ndjson"
+
+
+_checkpoint_lock = threading.Lock()
+
+
+def append_checkpoint(step_name: str, record: Dict[str, Any]) -> str:
+    """
+    Append a single record to a step's checkpoint log (one JSON object per line).
+    
+    Used for incremental progress between full save_state snapshots, so each
+    change costs O(record) I/O instead of rewriting the whole state file.
+    
+    Args:
+        step_name: Name of the step (e.g., 'vtex_category_tree')
+        record: JSON-serializable record to append
+        
+    Returns:
+        Path to the checkpoint log
+    """
+    ensure_state_dir()
+    log_file = _checkpoint_path(step_name)
+    line = _dumps_line(record)
+    with _checkpoint_lock:
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    return str(log_file)
+
+
+def load_checkpoints(step_name: str) -> List[Dict[str, Any]]:
+    """
+    Load all records from a step's checkpoint log, in the order they were written.
+    Truncated or malformed lines (e.g., from an interrupted write) are skipped.
+    
+    Args:
+        step_name: Name of the step
+        
+    Returns:
+        List of records (empty if no log exists)
+    """
+    log_file = _checkpoint_path(step_name)
+    if not log_file.exists():
+        return []
+    records = []
+    with open(log_file, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(_loads_line(line))
+            except ValueError:
+                continue
+    return records
+
+
+def clear_checkpoints(step_name: str) -> None:
+    """Remove a step's checkpoint log (call after its records are folded into a snapshot)."""
+    log_file = _checkpoint_path(step_name)
+    with _checkpoint_lock:
+        try:
+            log_file.unlink()
+        except FileNotFoundError:
+            pass
+
+
 def save_custom_prompt(instructions: str) -> str:
     """
     Save custom extraction prompt instructions to state.
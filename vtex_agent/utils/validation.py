@@ -1,5 +1,6 @@
 """Data validation and normalization utilities."""
 import re
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 
 
@@ -23,22 +24,29 @@ def normalize_spec_name(name: str) -> str:
         return name.upper()
 
 
+@lru_cache(maxsize=65536)
 def normalize_category_name(name: str) -> str:
     """
     Normalize category name: capitalize first letter of each word.
     
+    Results are memoized; category names repeat across most products.
+    
     Args:
         name: Category name to normalize
         
     Returns:
         Normalized category name
     """
-    if not name or not name.strip():
+    if not name:
+        return name
+    stripped = name.strip()
+    if not stripped:
         return name
     # Title case: first letter of each word capitalized
-    return name.strip().title()
+    return stripped.title()
 
 
+@lru_cache(maxsize=65536)
 def normalize_brand_name(name: str) -> str:
     """
     Normalize brand name: preserve case but trim whitespace.